@@ -0,0 +1,52 @@
+"""daily item usage rollup
+
+Revision ID: 3f2a9c1d7b40
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7b40'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # init() creates all model tables on application start, so the table
+    # may already exist; it is still backfilled while empty
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not inspector.has_table('daily_item_usage'):
+        op.create_table(
+            'daily_item_usage',
+            sa.Column('item_id', sa.String(length=10), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('transaction_type', sa.String(length=10), nullable=False),
+            sa.Column('quantity', sa.BigInteger(), nullable=False),
+            sa.Column('value', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('item_id', 'day', 'transaction_type')
+        )
+
+    # Backfill from existing transactions, if the table has already been created
+    if inspector.has_table('transactions'):
+        op.execute(
+            """
+            INSERT INTO daily_item_usage (item_id, day, transaction_type, quantity, value)
+            SELECT item_id, date::date, transaction_type, SUM(quantity), SUM(quantity * unit_price)
+            FROM transactions
+            WHERE NOT EXISTS (SELECT 1 FROM daily_item_usage)
+            GROUP BY item_id, date::date, transaction_type
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_item_usage')
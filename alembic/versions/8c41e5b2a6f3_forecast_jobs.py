@@ -0,0 +1,51 @@
+"""forecast jobs queue
+
+Revision ID: 8c41e5b2a6f3
+Revises: 3f2a9c1d7b40
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41e5b2a6f3'
+down_revision: Union[str, None] = '3f2a9c1d7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # init() creates all model tables on application start, so the table
+    # may already exist
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table('forecast_jobs'):
+        return
+
+    op.create_table(
+        'forecast_jobs',
+        sa.Column('job_id', sa.String(length=36), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('item_ids', sa.JSON(), nullable=False),
+        sa.Column('prediction_days', sa.Integer(), nullable=False),
+        sa.Column('progress', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('worker_id', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_index('ix_forecast_jobs_status_created_at', 'forecast_jobs', ['status', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_forecast_jobs_status_created_at', table_name='forecast_jobs')
+    op.drop_table('forecast_jobs')
@@ -0,0 +1,39 @@
+"""bulk loader progress
+
+Revision ID: a6d3c8e1f925
+Revises: f4a9d2c6e105
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3c8e1f925'
+down_revision: Union[str, None] = 'f4a9d2c6e105'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # init() and the loader itself create the table, so it may already exist
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table('load_progress'):
+        return
+
+    op.create_table(
+        'load_progress',
+        sa.Column('table_name', sa.String(length=100), nullable=False),
+        sa.Column('source', sa.Text(), nullable=False),
+        sa.Column('rows_loaded', sa.BigInteger(), nullable=False),
+        sa.Column('dropped_indexes', sa.JSON(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('load_progress')
@@ -0,0 +1,35 @@
+"""forecast job engine
+
+Revision ID: b5d07e9a4c21
+Revises: 8c41e5b2a6f3
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d07e9a4c21'
+down_revision: Union[str, None] = '8c41e5b2a6f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tables created by init() already have the column
+    bind = op.get_bind()
+    columns = [column['name'] for column in sa.inspect(bind).get_columns('forecast_jobs')]
+    if 'engine' in columns:
+        return
+
+    op.add_column(
+        'forecast_jobs',
+        sa.Column('engine', sa.String(length=20), nullable=False, server_default='prophet')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('forecast_jobs', 'engine')
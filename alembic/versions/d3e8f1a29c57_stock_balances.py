@@ -0,0 +1,57 @@
+"""stock balances projection
+
+Revision ID: d3e8f1a29c57
+Revises: b5d07e9a4c21
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3e8f1a29c57'
+down_revision: Union[str, None] = 'b5d07e9a4c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # init() creates all model tables on application start, so the table
+    # may already exist; it is still backfilled while empty
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not inspector.has_table('stock_balances'):
+        op.create_table(
+            'stock_balances',
+            sa.Column('item_id', sa.String(length=10), nullable=False),
+            sa.Column('quantity', sa.BigInteger(), nullable=False),
+            sa.Column('inbound_quantity', sa.BigInteger(), nullable=False),
+            sa.Column('outbound_quantity', sa.BigInteger(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+            sa.PrimaryKeyConstraint('item_id')
+        )
+
+    # Backfill from existing transactions, if the table has already been created
+    if inspector.has_table('transactions'):
+        op.execute(
+            """
+            INSERT INTO stock_balances (item_id, quantity, inbound_quantity, outbound_quantity, updated_at)
+            SELECT item_id,
+                   SUM(CASE WHEN transaction_type = 'Inbound' THEN quantity ELSE -quantity END),
+                   SUM(CASE WHEN transaction_type = 'Inbound' THEN quantity ELSE 0 END),
+                   SUM(CASE WHEN transaction_type = 'Outbound' THEN quantity ELSE 0 END),
+                   now()
+            FROM transactions
+            WHERE transaction_type IN ('Inbound', 'Outbound')
+              AND NOT EXISTS (SELECT 1 FROM stock_balances)
+            GROUP BY item_id
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('stock_balances')
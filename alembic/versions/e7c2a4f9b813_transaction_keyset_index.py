@@ -0,0 +1,52 @@
+"""transaction keyset pagination index
+
+Revision ID: e7c2a4f9b813
+Revises: d3e8f1a29c57
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c2a4f9b813'
+down_revision: Union[str, None] = 'd3e8f1a29c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The transactions table is created by the application, it may not exist yet
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('transactions'):
+        return
+
+    # CONCURRENTLY cannot run inside a transaction; building without it would
+    # block writes to transactions for the whole build.
+    # If a concurrent build fails it leaves an INVALID index behind: drop it
+    # by hand and rerun the migration
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_transactions_date_transaction_id',
+            'transactions',
+            ['date', 'transaction_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('transactions'):
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_transactions_date_transaction_id',
+            table_name='transactions',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
@@ -0,0 +1,87 @@
+"""transaction access path indexes
+
+Revision ID: f4a9d2c6e105
+Revises: e7c2a4f9b813
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a9d2c6e105'
+down_revision: Union[str, None] = 'e7c2a4f9b813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The transactions table is created by the application, it may not exist yet
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('transactions'):
+        return
+
+    # CONCURRENTLY cannot run inside a transaction; building without it would
+    # block writes to transactions for the whole build.
+    # If a concurrent build fails it leaves an INVALID index behind: drop it
+    # by hand and rerun the migration
+    with op.get_context().autocommit_block():
+        # Filters by item_id with date ranges and keyset order; the included
+        # columns let per-day quantity sums skip the heap
+        op.create_index(
+            'ix_transactions_item_id_date',
+            'transactions',
+            ['item_id', 'date', 'transaction_id'],
+            postgresql_include=['transaction_type', 'quantity', 'unit_price'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+        # Rows arrive roughly in date order, so a BRIN index answers date range
+        # scans at a fraction of the B-tree size
+        op.create_index(
+            'ix_transactions_date_brin',
+            'transactions',
+            ['date'],
+            postgresql_using='brin',
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+        # Duplicates the primary key index and only slows down writes
+        op.drop_index(
+            'ix_transactions_transaction_id',
+            table_name='transactions',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('transactions'):
+        return
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_transactions_transaction_id',
+            'transactions',
+            ['transaction_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.drop_index(
+            'ix_transactions_date_brin',
+            table_name='transactions',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+        op.drop_index(
+            'ix_transactions_item_id_date',
+            table_name='transactions',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
@@ -0,0 +1,394 @@
+"""
+Бенчмарк конвейера прогнозирования
+
+Строит воспроизводимые наборы данных генератором из generate_dataset.py, загружает
+суточные агрегаты во временную базу SQLite и замеряет время и пиковую память
+каждой стадии. PostgreSQL и другие внешние сервисы не нужны.
+
+Запуск из корня проекта:
+    python -m benchmarks.forecast_pipeline --label base
+    python -m benchmarks.forecast_pipeline --items 10000 --years 10 --max-cells 0 --no-memory
+    python -m benchmarks.forecast_pipeline --compare benchmarks/results/base.json benchmarks/results/head.json
+"""
+import os
+import gc
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+import numpy as np
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from generate_dataset import generate_items, generate_daily_quantities
+from models.item_model import ItemModel
+from models.daily_item_usage_model import DailyItemUsageModel
+from repositories.item_repository import ItemRepository
+from repositories.transaction_repository import TransactionRepository
+from repositories.daily_item_usage_repository import DailyItemUsageRepository
+from services.item_service import ItemService
+from services.transaction_service import TransactionService
+from services.forecast_service import ForecastService
+from utils.predict import prepare_data_from_db, predict_usage
+from utils.fast_forecast import forecast_items_fast
+from utils.holiday_calendar import get_holidays
+from utils.model_registry import ModelRegistry
+from utils.forecast_cache import ForecastCache
+from utils.item_cache import ItemCache
+from utils.forecast_executor import ForecastExecutor
+from schemas.pydantic.prediction_schema import PredictionResponseSchema
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "results")
+
+# Размер пачки строк при заполнении SQLite
+INSERT_CHUNK_ROWS = 100_000
+
+# Наборы больше этого числа ячеек товары x дни по умолчанию пропускаются:
+# 10 000 товаров за 10 лет требуют десятки гигабайт памяти на стадии fetch
+DEFAULT_MAX_CELLS = 5_000_000
+
+
+def measure(
+    stages: Dict[str, dict],
+    name: str,
+    fn: Callable,
+    trace_fn: Optional[Callable] = None,
+    trace: bool = True,
+    **extra
+):
+    """
+    Выполняет стадию и записывает время и пиковую память Python-аллокаций
+
+    Время замеряется без трассировки: tracemalloc замедляет аллокации в разы.
+    Затем стадия повторяется под tracemalloc (trace_fn - для стадий, которым
+    нужно чистое состояние, например пустой реестр моделей). Учитываются массивы
+    NumPy и объекты Python, но не внешние процессы вроде оптимизатора Stan.
+    """
+    gc.collect()
+    started = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - started
+
+    peak = None
+    if trace:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            (trace_fn or fn)()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    stages[name] = {"seconds": round(seconds, 6), "peak_bytes": peak, **extra}
+    memory = f"{peak / 2 ** 20:10.1f} МиБ" if peak is not None else ""
+    print(f"  {name:<15} {seconds:10.3f} с {memory}", flush=True)
+    return result
+
+
+def load_dataset(session, items_df, dates, demand, restock) -> int:
+    # Загружаем товары и суточные агрегаты так же, как их видит DailyItemUsageRepository
+    item_ids = items_df['item_id'].str.replace('ITEM', '').astype(int).to_numpy()
+    session.execute(
+        ItemModel.__table__.insert(),
+        [
+            {**row, "item_id": int(item_id)}
+            for item_id, row in zip(item_ids, items_df.drop(columns='item_id').to_dict('records'))
+        ]
+    )
+
+    days = dates.strftime('%Y-%m-%d').to_numpy()
+    sale_prices = items_df['sale_price'].to_numpy()
+    purchase_prices = items_df['purchase_price'].to_numpy()
+    item_index, day_index = np.nonzero(demand)
+
+    connection = session.connection()
+    rows = 0
+    for start in range(0, len(item_index), INSERT_CHUNK_ROWS):
+        items = item_index[start:start + INSERT_CHUNK_ROWS]
+        day_slice = day_index[start:start + INSERT_CHUNK_ROWS]
+        chunk = []
+        for transaction_type, quantities, prices in (
+            ("Outbound", demand, sale_prices),
+            ("Inbound", restock, purchase_prices)
+        ):
+            quantity = quantities[items, day_slice]
+            chunk.extend(zip(
+                item_ids[items].astype(str).tolist(),
+                days[day_slice].tolist(),
+                [transaction_type] * len(items),
+                quantity.tolist(),
+                (quantity * prices[items]).tolist()
+            ))
+        connection.exec_driver_sql(
+            "INSERT INTO daily_item_usage (item_id, day, transaction_type, quantity, value) "
+            "VALUES (?, ?, ?, ?, ?)",
+            chunk
+        )
+        rows += len(chunk)
+
+    session.commit()
+    return rows
+
+
+def run_size(items: int, years: int, args, workdir: str) -> dict:
+    print(f"Набор: {items} товаров, {years} лет", flush=True)
+
+    end_date = datetime.strptime(args.end_date, "%Y-%m-%d")
+    start_date = end_date - timedelta(days=365 * years - 1)
+    items_df = generate_items(items, seed=args.seed)
+    dates, demand, restock = generate_daily_quantities(items_df, start_date, end_date, seed=args.seed)
+
+    # Отдельная база на каждый размер, чтобы размер файла не влиял на соседние замеры
+    database = os.path.join(workdir, f'bench-{items}-{years}.db')
+    engine = create_engine(f"sqlite:///{database}")
+    ItemModel.__table__.create(engine)
+    DailyItemUsageModel.__table__.create(engine)
+
+    # Данные загружаются синхронно, а репозитории, как в приложении, работают
+    # через AsyncSession; все стадии выполняются в одном цикле событий,
+    # к которому привязаны соединения асинхронного движка
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database}")
+    session = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)()
+    runner = asyncio.Runner()
+
+    try:
+        with sessionmaker(bind=engine)() as load_session:
+            stored_rows = load_dataset(load_session, items_df, dates, demand, restock)
+        item_ids = list(range(1, items + 1))
+        stages = {}
+        trace = not args.no_memory
+
+        def fresh_path(prefix: str) -> str:
+            return tempfile.mkdtemp(prefix=f"{prefix}-", dir=workdir)
+
+        rows = measure(
+            stages, "fetch",
+            lambda: runner.run(DailyItemUsageRepository(session).daily_quantities(item_ids)),
+            trace=trace
+        )
+        stages["fetch"]["rows"] = len(rows)
+
+        usage = measure(stages, "densify", lambda: prepare_data_from_db(rows), trace=trace)
+        del rows
+
+        series = measure(
+            stages, "frame",
+            lambda: {item_id: usage.series(item_id) for item_id in item_ids},
+            trace=trace
+        )
+
+        # Prophet обучается по несколько секунд на товар, поэтому берем выборку
+        sample = item_ids[:args.fit_items]
+        registry = ModelRegistry(fresh_path("registry"))
+
+        def fit_sample(registry: ModelRegistry) -> list:
+            return [predict_usage(series[item_id], item_id, args.days, registry) for item_id in sample]
+
+        measure(
+            stages, "fit",
+            lambda: fit_sample(registry),
+            trace_fn=lambda: fit_sample(ModelRegistry(fresh_path("registry"))),
+            trace=trace,
+            items=len(sample)
+        )
+        measure(stages, "predict", lambda: fit_sample(registry), trace=trace, items=len(sample))
+        del series
+
+        names = {item_id: f"Товар {item_id}" for item_id in item_ids}
+        measure(
+            stages, "fast",
+            lambda: forecast_items_fast(
+                usage, names, args.days,
+                get_holidays(usage.dates[0], usage.dates[-1] + np.timedelta64(args.days, 'D'))
+            ),
+            trace=trace,
+            items=len(item_ids)
+        )
+        del usage
+
+        # Обработчик /api/v1/predict/ без HTTP: сервис с теми же зависимостями, что в FastAPI
+        executor = ForecastExecutor(max_workers=1)
+
+        def forecast_service(cache_path: str) -> ForecastService:
+            cache = ForecastCache(cache_path, max_entries=items)
+            return ForecastService(
+                item_service=ItemService(ItemRepository(session), ItemCache(max_entries=items), cache),
+                transaction_service=TransactionService(TransactionRepository(session), cache),
+                registry=registry,
+                executor=executor,
+                cache=cache
+            )
+
+        def handle(service: ForecastService) -> list:
+            return runner.run(service.predict(item_ids, args.days, engine="fast"))
+
+        service = forecast_service(fresh_path("cache"))
+        try:
+            responses = measure(
+                stages, "handler",
+                lambda: handle(service),
+                trace_fn=lambda: handle(forecast_service(fresh_path("cache"))),
+                trace=trace,
+                items=len(item_ids)
+            )
+            measure(stages, "handler_cached", lambda: handle(service), trace=trace, items=len(item_ids))
+        finally:
+            executor.shutdown()
+
+        # Сериализация ответа, как ее выполняет FastAPI для response_model
+        adapter = TypeAdapter(List[PredictionResponseSchema])
+        body = measure(
+            stages, "serialize",
+            lambda: json.dumps(adapter.dump_python(responses, mode="json"), ensure_ascii=False),
+            trace=trace
+        )
+        stages["serialize"]["bytes"] = len(body.encode("utf-8"))
+
+        return {
+            "items": items,
+            "years": years,
+            "days": len(dates),
+            "stored_rows": stored_rows,
+            "stages": stages
+        }
+    finally:
+        runner.run(session.close())
+        runner.run(async_engine.dispose())
+        runner.close()
+        engine.dispose()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args) -> str:
+    commit = git_commit()
+    report = {
+        "label": args.label or commit,
+        "commit": commit,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {
+            "seed": args.seed,
+            "end_date": args.end_date,
+            "days": args.days,
+            "fit_items": args.fit_items,
+            "max_cells": args.max_cells,
+            "memory": not args.no_memory
+        },
+        "runs": []
+    }
+
+    os.makedirs(RESULTS_PATH, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_PATH, f"{report['label']}.json")
+
+    with tempfile.TemporaryDirectory(prefix="forecast-bench-") as workdir:
+        for items in sorted(args.items):
+            for years in sorted(args.years):
+                if args.max_cells and items * 365 * years > args.max_cells:
+                    print(f"Набор {items} товаров, {years} лет пропущен: больше --max-cells={args.max_cells}")
+                    continue
+
+                report["runs"].append(run_size(items, years, args, workdir))
+
+                # Пишем после каждого размера, чтобы прерванный прогон сохранил результаты
+                with open(output, "w", encoding="utf-8") as file:
+                    json.dump(report, file, ensure_ascii=False, indent=2)
+
+    print(f"Результаты сохранены в {output}")
+    return output
+
+
+def compare(base_path: str, head_path: str, threshold: float = None) -> int:
+    with open(base_path, encoding="utf-8") as file:
+        base = json.load(file)
+    with open(head_path, encoding="utf-8") as file:
+        head = json.load(file)
+
+    base_runs = {(run["items"], run["years"]): run for run in base["runs"]}
+    regressions = 0
+
+    print(f"{base['label']} -> {head['label']}")
+    print(f"{'набор':<14}{'стадия':<16}{'было, с':>10}{'стало, с':>10}{'x время':>9}{'x память':>10}")
+    for run in head["runs"]:
+        key = (run["items"], run["years"])
+        if key not in base_runs:
+            continue
+
+        for name, stage in run["stages"].items():
+            before = base_runs[key]["stages"].get(name)
+            if before is None:
+                continue
+
+            time_ratio = stage["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+            memory_ratio = (
+                stage["peak_bytes"] / before["peak_bytes"]
+                if stage["peak_bytes"] and before["peak_bytes"] else float("nan")
+            )
+            marker = ""
+            if threshold is not None and time_ratio > threshold:
+                regressions += 1
+                marker = "  !"
+
+            print(
+                f"{f'{key[0]}x{key[1]}y':<14}{name:<16}{before['seconds']:>10.3f}{stage['seconds']:>10.3f}"
+                f"{time_ratio:>9.2f}{memory_ratio:>10.2f}{marker}"
+            )
+
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейера прогнозирования")
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 10000], help="количества товаров")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 10], help="длины истории в годах")
+    parser.add_argument("--seed", type=int, default=42, help="зерно генератора данных")
+    parser.add_argument("--end-date", default="2024-12-31", help="последний день истории (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=30, help="горизонт прогноза в днях")
+    parser.add_argument("--fit-items", type=int, default=2, help="сколько товаров обучать Prophet")
+    parser.add_argument(
+        "--max-cells", type=int, default=DEFAULT_MAX_CELLS,
+        help="пропускать наборы, где товаров x дней больше (0 - без ограничения)"
+    )
+    parser.add_argument("--no-memory", action="store_true", help="не замерять пиковую память (вдвое быстрее)")
+    parser.add_argument("--label", help="имя прогона, по умолчанию короткий хэш коммита")
+    parser.add_argument("--output", help="путь к JSON с результатами")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BASE", "HEAD"),
+        help="сравнить два файла результатов вместо запуска"
+    )
+    parser.add_argument(
+        "--threshold", type=float,
+        help="с --compare: код возврата 1, если стадия замедлилась больше чем в THRESHOLD раз"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, threshold=args.threshold)
+
+    run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,12 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+import random
+
+from typing import AsyncIterator
+
+from fastapi import Header
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from configs.enviroment import get_environment_variables
 
@@ -9,23 +16,87 @@ env = get_environment_variables()
 # Generate Database URL
 DATABASE_URL = f"{env.DATABASE_DIALECT}://{env.DATABASE_USERNAME}:{env.DATABASE_PASSWORD}@{env.DATABASE_HOSTNAME}:{env.DATABASE_PORT}/{env.DATABASE_NAME}"
 
+# Same database through the asyncio driver, used by the application
+ASYNC_DATABASE_URL = f"{env.DATABASE_DIALECT}+{env.DATABASE_ASYNC_DRIVER}://{env.DATABASE_USERNAME}:{env.DATABASE_PASSWORD}@{env.DATABASE_HOSTNAME}:{env.DATABASE_PORT}/{env.DATABASE_NAME}"
+
 # Create Database Engine
+# Synchronous engine for table creation and data loading scripts
 engine = create_engine(
     DATABASE_URL, echo=env.DEBUG_MODE, future=True,
-    pool_size=50, max_overflow=100, pool_timeout=60, 
+    pool_size=50, max_overflow=100, pool_timeout=60,
     pool_pre_ping=True, pool_recycle=3600
 )
 
-session_local = sessionmaker(
-    autocommit=False, autoflush=False, bind=engine
+# Create Async Database Engine
+# Concurrent requests queue for a pooled connection once the pool is
+# exhausted, so pool_size + max_overflow must stay below the server's max_connections
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, echo=env.DEBUG_MODE,
+    pool_size=env.DATABASE_POOL_SIZE, max_overflow=env.DATABASE_MAX_OVERFLOW, pool_timeout=60,
+    pool_pre_ping=True, pool_recycle=3600
+)
+
+# Optional read replicas, given as comma separated URLs of the same database
+replica_engines = [
+    create_async_engine(
+        make_url(url.strip()).set(drivername=f"{env.DATABASE_DIALECT}+{env.DATABASE_ASYNC_DRIVER}"),
+        echo=env.DEBUG_MODE,
+        pool_size=env.DATABASE_POOL_SIZE, max_overflow=env.DATABASE_MAX_OVERFLOW, pool_timeout=60,
+        pool_pre_ping=True, pool_recycle=3600
+    )
+    for url in env.DATABASE_REPLICA_URLS.split(",") if url.strip()
+]
+
+# Session.info keys that drive replica routing
+READ_ONLY = "read_only"
+PRIMARY_ONLY = "primary_only"
+PRIMARY_READS = "primary_reads"
+REPLICA = "replica"
+
+# Request header that keeps every read of the request on the primary
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+
+
+class RoutingSession(Session):
+    """
+    Sends reads of read-only repository methods to a replica, everything else to the primary
+
+    Once the session has written, it stays on the primary for the rest of
+    its life, so a request reads its own writes despite replication lag.
+    The replica is chosen once per session: replicas lag by different
+    amounts, and reads of one request must not go back in time.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info[PRIMARY_ONLY] = True
+
+        on_primary = self.info.get(PRIMARY_ONLY) or self.info.get(PRIMARY_READS)
+        if replica_engines and self.info.get(READ_ONLY) and not on_primary:
+            if REPLICA not in self.info:
+                self.info[REPLICA] = random.choice(replica_engines)
+            return self.info[REPLICA].sync_engine
+
+        return async_engine.sync_engine
+
+
+# Objects stay loaded after commit: an expired attribute would need
+# implicit IO, which AsyncSession cannot do
+async_session_local = async_sessionmaker(
+    autoflush=False, expire_on_commit=False, sync_session_class=RoutingSession
 )
 
 
-def get_db_connection():
-    db = scoped_session(session_local)
-    
-    try:
+async def get_db_connection(
+    read_your_writes: bool = Header(default=False, alias=READ_YOUR_WRITES_HEADER)
+) -> AsyncIterator[AsyncSession]:
+    async with async_session_local() as db:
+        db.info[PRIMARY_ONLY] = read_your_writes
         yield db
-    finally:
-        db.close()
 
+
+async def dispose_engines() -> None:
+    await async_engine.dispose()
+
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
@@ -20,11 +20,28 @@ class EnvironmentSettings(BaseSettings):
     DATABASE_PASSWORD: str
     DATABASE_PORT: int
     DATABASE_USERNAME: str
+    DATABASE_ASYNC_DRIVER: str = "asyncpg"
+    DATABASE_POOL_SIZE: int = 50
+    DATABASE_MAX_OVERFLOW: int = 100
+    DATABASE_REPLICA_URLS: str = ""
     GRAPHQL_USERNAME: str
     GRAPHQL_PASSWORD: str
     INTEGRATION_API_KEY: str
     LOGFIRE_PROJECT_API_KEY: str
     DEBUG_MODE: bool
+    MODEL_REGISTRY_PATH: str = "model_registry"
+    FORECAST_WORKERS: int = 0
+    FORECAST_THREADS_PER_WORKER: int = 1
+    FORECAST_JOB_HEARTBEAT_SECONDS: float = 15
+    FORECAST_JOB_STALE_SECONDS: float = 120
+    FORECAST_JOB_MAX_ATTEMPTS: int = 3
+    FORECAST_CACHE_PATH: str = "forecast_cache"
+    FORECAST_CACHE_SIZE: int = 1024
+    ITEM_CACHE_SIZE: int = 10000
+    ITEM_CACHE_TTL_SECONDS: float = 60
+    LOG_LEVEL: str = "INFO"
+    BULK_MAX_ROWS: int = 10000
+    EXPORT_CHUNK_SIZE: int = 10000
 
     class Config:
         env_file = get_env_filename()
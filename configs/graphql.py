@@ -1,10 +1,23 @@
 from fastapi import Depends
 from strawberry.types import Info
+from graphql.execution import ExecutionContext
 
 from services.transaction_service import TransactionService
 from services.item_service import ItemService
 
 
+class SerialExecutionContext(ExecutionContext):
+    """
+    Выполняет поля запроса по очереди, как мутации
+
+    Сервисы в контексте делят одну AsyncSession запроса, а она не допускает
+    параллельных операций, которые graphql-core запускает для полей query.
+    """
+
+    def execute_fields(self, parent_type, source_value, path, fields):
+        return self.execute_fields_serially(parent_type, source_value, path, fields)
+
+
 async def get_graphql_context(
     transaction_service: TransactionService = Depends(),
     item_service: ItemService = Depends()
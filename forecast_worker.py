@@ -0,0 +1,108 @@
+import os
+import socket
+import asyncio
+import logging
+import argparse
+
+from datetime import timedelta
+
+from prometheus_client import start_http_server
+
+from configs.database import async_session_local
+from configs.enviroment import get_environment_variables
+from repositories.item_repository import ItemRepository
+from repositories.transaction_repository import TransactionRepository
+from repositories.forecast_job_repository import ForecastJobRepository
+from services.item_service import ItemService
+from services.transaction_service import TransactionService
+from services.forecast_service import ForecastService
+from utils.model_registry import get_model_registry
+from utils.forecast_cache import get_forecast_cache
+from utils.item_cache import get_item_cache
+from utils.forecast_executor import get_forecast_executor
+from utils.metrics import configure_logging
+
+env = get_environment_variables()
+logger = logging.getLogger(__name__)
+
+
+async def send_heartbeats(job_id: str, worker_id: str, interval: float) -> None:
+    # Отдельная сессия, чтобы не мешать основной работе с задачей
+    while True:
+        await asyncio.sleep(interval)
+        async with async_session_local() as session:
+            await ForecastJobRepository(session).heartbeat(job_id, worker_id)
+
+
+async def process_job(job_id: str, worker_id: str) -> None:
+    session = async_session_local()
+    jobs = ForecastJobRepository(session)
+    heartbeats = asyncio.create_task(
+        send_heartbeats(job_id, worker_id, env.FORECAST_JOB_HEARTBEAT_SECONDS)
+    )
+
+    try:
+        job = await jobs.get(job_id)
+        service = ForecastService(
+            item_service=ItemService(ItemRepository(session), get_item_cache(), get_forecast_cache()),
+            transaction_service=TransactionService(TransactionRepository(session), get_forecast_cache()),
+            registry=get_model_registry(),
+            executor=get_forecast_executor(),
+            cache=get_forecast_cache()
+        )
+
+        async def on_progress(completed: int, total: int) -> None:
+            await jobs.heartbeat(job_id, worker_id, progress=completed)
+
+        responses = await service.predict(
+            job.item_ids,
+            job.prediction_days,
+            engine=job.engine,
+            on_progress=on_progress
+        )
+        if await jobs.finish(job_id, worker_id, result=[r.model_dump(mode="json") for r in responses]):
+            logger.info("Задача %s выполнена", job_id)
+        else:
+            logger.warning("Задача %s передана другому воркеру, результат отброшен", job_id)
+    except Exception as e:
+        await session.rollback()
+        await jobs.finish(job_id, worker_id, error=str(e))
+        logger.exception("Задача %s завершилась ошибкой", job_id)
+    finally:
+        heartbeats.cancel()
+        await session.close()
+
+
+async def run_worker(worker_id: str, poll_interval: float) -> None:
+    stale_after = timedelta(seconds=env.FORECAST_JOB_STALE_SECONDS)
+    logger.info("Воркер прогнозирования %s запущен", worker_id)
+
+    while True:
+        async with async_session_local() as session:
+            job = await ForecastJobRepository(session).claim(worker_id, stale_after, env.FORECAST_JOB_MAX_ATTEMPTS)
+            job_id = job.job_id if job else None
+
+        if job_id is None:
+            await asyncio.sleep(poll_interval)
+            continue
+
+        await process_job(job_id, worker_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Воркер фоновых задач прогнозирования")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Пауза между опросами очереди, сек")
+    parser.add_argument("--metrics-port", type=int, help="Порт для отдачи метрик Prometheus")
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.metrics_port:
+        # Стадии прогнозов считаются в этом процессе, поэтому отдаем их отдельно от API
+        start_http_server(args.metrics_port)
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    try:
+        asyncio.run(run_worker(worker_id, args.poll_interval))
+    finally:
+        get_forecast_executor().shutdown()
@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import numpy as np
 import random
@@ -5,153 +6,169 @@ from datetime import datetime, timedelta
 import uuid
 import matplotlib.pyplot as plt
 
-# Set seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+# Расширенный список праздников
+HOLIDAYS = [
+    (1, 1),   # Новый год
+    (1, 2),   # Новогодние каникулы
+    (1, 3),   # Новогодние каникулы
+    (1, 4),   # Новогодние каникулы
+    (1, 5),   # Новогодние каникулы
+    (1, 6),   # Новогодние каникулы
+    (1, 7),   # Рождество Христово
+    (1, 8),   # Новогодние каникулы
+    (2, 14),  # День святого Валентина
+    (2, 23),  # День защитника Отечества
+    (3, 8),   # Международный женский день
+    (4, 12),  # День космонавтики
+    (5, 1),   # Праздник Весны и Труда
+    (5, 9),   # День Победы
+    (6, 1),   # День защиты детей
+    (6, 12),  # День России
+    (7, 8),   # День семьи, любви и верности
+    (8, 22),  # День государственного флага
+    (9, 1),   # День знаний
+    (10, 5),  # День учителя
+    (11, 4),  # День народного единства
+    (11, 27), # День матери
+    (12, 12), # День Конституции
+    (12, 31), # Канун Нового года
+]
 
-# Генерация 100 товаров
-def generate_items():
+# Праздники, перед которыми спрос растет за 5 дней
+PRE_HOLIDAYS = [(1, 1), (12, 31), (2, 23), (3, 8), (5, 9), (6, 12), (11, 4)]
+
+
+# Генерация товаров
+def generate_items(count=100, seed=42):
+    rng = random.Random(seed)
     categories = ['Electronics', 'Food', 'Clothing', 'Home', 'Beauty', 'Sports', 'Books', 'Toys', 'Garden', 'Auto']
     suppliers = ['Supplier A', 'Supplier B', 'Supplier C', 'Supplier D', 'Supplier E']
     storage_conditions = ['Normal', 'Refrigerated', 'Frozen', 'Cool', 'Warm']
-    
+
     items = []
-    for i in range(1, 101):
-        category = random.choice(categories)
-        base_price = random.uniform(10, 1000)
+    for i in range(1, count + 1):
+        category = rng.choice(categories)
+        base_price = rng.uniform(10, 1000)
         items.append({
             'item_id': f'ITEM{i}',
             'item_name': f'Товар {i}',
             'category': category,
-            'supplier': random.choice(suppliers),
+            'supplier': rng.choice(suppliers),
             'purchase_price': base_price,
-            'sale_price': base_price * random.uniform(1.3, 1.8),
-            'units': 'units' if category != 'Food' else random.choice(['kg', 'units']),
-            'storage_condition': random.choice(storage_conditions),
-            'shelf_life_days': random.randint(30, 730),
+            'sale_price': base_price * rng.uniform(1.3, 1.8),
+            'units': 'units' if category != 'Food' else rng.choice(['kg', 'units']),
+            'storage_condition': rng.choice(storage_conditions),
+            'shelf_life_days': rng.randint(30, 730),
         })
     return pd.DataFrame(items)
 
 def is_russian_holiday(date):
-    # Расширенный список праздников
-    holidays = [
-        (1, 1),   # Новый год
-        (1, 2),   # Новогодние каникулы
-        (1, 3),   # Новогодние каникулы
-        (1, 4),   # Новогодние каникулы
-        (1, 5),   # Новогодние каникулы
-        (1, 6),   # Новогодние каникулы
-        (1, 7),   # Рождество Христово
-        (1, 8),   # Новогодние каникулы
-        (2, 14),  # День святого Валентина
-        (2, 23),  # День защитника Отечества
-        (3, 8),   # Международный женский день
-        (4, 12),  # День космонавтики
-        (5, 1),   # Праздник Весны и Труда
-        (5, 9),   # День Победы
-        (6, 1),   # День защиты детей
-        (6, 12),  # День России
-        (7, 8),   # День семьи, любви и верности
-        (8, 22),  # День государственного флага
-        (9, 1),   # День знаний
-        (10, 5),  # День учителя
-        (11, 4),  # День народного единства
-        (11, 27), # День матери
-        (12, 12), # День Конституции
-        (12, 31), # Канун Нового года
-    ]
-    return (date.month, date.day) in holidays
-
-# Генерация транзакций за 10 лет
-def generate_transactions(items_df, start_date, end_date):
-    date_range = pd.date_range(start=start_date, end=end_date)
-    transactions = []
-    
-    for date in date_range:
-        month = date.month
-        weekday = date.weekday()
-        is_holiday = is_russian_holiday(date)
-        
-        for _, item in items_df.iterrows():
-            # Базовый спрос и сезонность для каждого товара
-            category = item['category']
-            if category == 'Electronics':
-                base_demand = random.randint(20, 40)
-                seasonal_factor = 1.5 if month in [11, 12] else 1.0
-                if (month == 2 and date.day in range(15, 24)) or (month == 3 and date.day in range(1, 9)):
-                    seasonal_factor *= 1.8
-            elif category == 'Food':
-                base_demand = random.randint(40, 60)
-                seasonal_factor = 1.2 if month in [6, 7, 8] else 1.0
-                if month == 12 and date.day > 15:
-                    seasonal_factor *= 2.0
-            else:
-                base_demand = random.randint(10, 100)
-                seasonal_factor = 1.0 + 0.3 * np.sin(2 * np.pi * (date.dayofyear / 365))
-            
-            # Праздничный фактор
-            holiday_factor = 1.8 if is_holiday else 1.0
-            
-            # Предпраздничный фактор (за 5 дней до праздника)
-            for h_month, h_day in [(m, d) for m, d in [(1,1), (12,31), (2,23), (3,8), (5,9), (6,12), (11,4)]]:
-                holiday_date = datetime(date.year, h_month, h_day).date()
-                days_until_holiday = (holiday_date - date.date()).days
-                if 0 <= days_until_holiday <= 5:
-                    holiday_factor = 1.5
-            
-            # Тренд (увеличение спроса на 20% за 10 лет)
-            days_since_start = (date - start_date).days
-            trend_factor = 1 + (days_since_start / 3650) * 0.2
-            
-            # Случайные колебания
-            random_factor = np.random.normal(1, 0.15)
-            
-            # Расчет спроса с учетом праздников
-            demand = base_demand * seasonal_factor * trend_factor * random_factor * holiday_factor
-            demand = max(0, int(demand))
-            
-            if demand > 0:
-                # Исходящие транзакции (продажи)
-                transactions.append({
-                    'transaction_id': str(uuid.uuid4()),
-                    'date': date,
-                    'item_id': item['item_id'],
-                    'transaction_type': 'Outbound',
-                    'quantity': demand,
-                    'unit_price': item['sale_price'],
-                })
-                
-                # Входящие транзакции (пополнение) с учетом праздников
-                restock_quantity = int(demand * 1.2) if is_holiday else demand + random.randint(0, 5)
-                transactions.append({
-                    'transaction_id': str(uuid.uuid4()),
-                    'date': date,
-                    'item_id': item['item_id'],
-                    'transaction_type': 'Inbound',
-                    'quantity': restock_quantity,
-                    'unit_price': item['purchase_price'],
-                })
-    
-    return pd.DataFrame(transactions)
+    return (date.month, date.day) in HOLIDAYS
+
+# Генерация суточного расхода и пополнения сразу для всех товаров и дней
+def generate_daily_quantities(items_df, start_date, end_date, seed=42):
+    """
+    Возвращает даты и матрицы товары x дни: продажи (Outbound) и пополнение (Inbound)
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start=start_date, end=end_date)
+    shape = (len(items_df), len(dates))
+
+    month = dates.month.to_numpy()[None, :]
+    day = dates.day.to_numpy()[None, :]
+    category = items_df['category'].to_numpy()[:, None]
+    electronics = category == 'Electronics'
+    food = category == 'Food'
+
+    # Базовый спрос и сезонность для каждого товара
+    base_demand = np.where(
+        electronics, rng.integers(20, 41, shape),
+        np.where(food, rng.integers(40, 61, shape), rng.integers(10, 101, shape))
+    )
+
+    electronics_season = np.where(np.isin(month, [11, 12]), 1.5, 1.0)
+    electronics_season = electronics_season * np.where(
+        ((month == 2) & (day >= 15) & (day < 24)) | ((month == 3) & (day < 9)), 1.8, 1.0
+    )
+    food_season = np.where(np.isin(month, [6, 7, 8]), 1.2, 1.0)
+    food_season = food_season * np.where((month == 12) & (day > 15), 2.0, 1.0)
+    other_season = 1.0 + 0.3 * np.sin(2 * np.pi * (dates.dayofyear.to_numpy()[None, :] / 365))
+    seasonal_factor = np.where(electronics, electronics_season, np.where(food, food_season, other_season))
+
+    # Праздничный фактор
+    is_holiday = np.isin(month * 100 + day, [m * 100 + d for m, d in HOLIDAYS])
+    holiday_factor = np.where(is_holiday, 1.8, 1.0)
+
+    # Предпраздничный фактор (за 5 дней до праздника)
+    for h_month, h_day in PRE_HOLIDAYS:
+        holiday_dates = pd.to_datetime({'year': dates.year, 'month': h_month, 'day': h_day})
+        days_until_holiday = (holiday_dates.to_numpy().astype('datetime64[D]') - dates.to_numpy().astype('datetime64[D]')).astype(int)
+        holiday_factor = np.where((days_until_holiday >= 0) & (days_until_holiday <= 5), 1.5, holiday_factor)
+
+    # Тренд (увеличение спроса на 20% за 10 лет)
+    days_since_start = (dates - dates[0]).days.to_numpy()[None, :]
+    trend_factor = 1 + (days_since_start / 3650) * 0.2
+
+    # Случайные колебания
+    random_factor = rng.normal(1, 0.15, shape)
+
+    # Расчет спроса с учетом праздников
+    demand = base_demand * seasonal_factor * trend_factor * random_factor * holiday_factor
+    demand = np.maximum(0, np.trunc(demand)).astype('int64')
+
+    # Входящие транзакции (пополнение) с учетом праздников
+    restock = np.where(
+        is_holiday,
+        np.trunc(demand * 1.2).astype('int64'),
+        demand + rng.integers(0, 6, shape)
+    )
+    restock[demand == 0] = 0
+
+    return dates, demand, restock
+
+# Генерация транзакций
+def generate_transactions(items_df, start_date, end_date, seed=42):
+    dates, demand, restock = generate_daily_quantities(items_df, start_date, end_date, seed=seed)
+    rng = np.random.default_rng(seed)
+
+    # Транзакции идут по дням, внутри дня - по товарам: продажа, затем пополнение
+    day_index, item_index = np.nonzero(demand.T > 0)
+    count = len(day_index)
+
+    # UUID4 из генератора с зерном, чтобы набор воспроизводился целиком
+    id_bytes = rng.integers(0, 256, (2 * count, 16), dtype=np.uint8)
+
+    transactions = pd.DataFrame({
+        'transaction_id': [str(uuid.UUID(bytes=row.tobytes(), version=4)) for row in id_bytes],
+        'date': np.repeat(dates[day_index], 2),
+        'item_id': np.repeat(items_df['item_id'].to_numpy()[item_index], 2),
+        'transaction_type': np.tile(['Outbound', 'Inbound'], count),
+        'quantity': np.column_stack([demand[item_index, day_index], restock[item_index, day_index]]).ravel(),
+        'unit_price': np.column_stack([
+            items_df['sale_price'].to_numpy()[item_index],
+            items_df['purchase_price'].to_numpy()[item_index]
+        ]).ravel(),
+    })
+    return transactions
 
 def plot_usage_history(transactions_df):
     plt.figure(figsize=(15, 10))
-    
+
     # Группировка данных по датам и категориям для исходящих транзакций
     daily_usage = transactions_df[transactions_df['transaction_type'] == 'Outbound'].groupby(
         ['date', 'item_id'])['quantity'].sum().reset_index()
-    
+
     # Выбираем случайные 5 товаров для отображения
-    sample_items = random.sample(daily_usage['item_id'].unique().tolist(), 5)
-    
+    sample_items = random.sample(daily_usage['item_id'].unique().tolist(), min(5, daily_usage['item_id'].nunique()))
+
     # Построение графиков для выбранных товаров
     for item_id in sample_items:
         item_data = daily_usage[daily_usage['item_id'] == item_id]
-        plt.plot(item_data['date'], item_data['quantity'], 
+        plt.plot(item_data['date'], item_data['quantity'],
                 label=f'Товар {item_id[4:]}',
                 alpha=0.7)
-    
-    plt.title('История использования товаров за 10 лет\n(с учетом российских праздников)')
+
+    plt.title('История использования товаров\n(с учетом российских праздников)')
     plt.xlabel('Дата')
     plt.ylabel('Количество')
     plt.legend()
@@ -160,19 +177,28 @@ def plot_usage_history(transactions_df):
     plt.close()
 
 def main():
-    start_date = datetime.now() - timedelta(days=3650)  # 10 лет назад
+    parser = argparse.ArgumentParser(description="Генерация синтетических товаров и транзакций")
+    parser.add_argument("--items", type=int, default=100, help="количество товаров")
+    parser.add_argument("--years", type=int, default=10, help="длина истории в годах")
+    parser.add_argument("--seed", type=int, default=42, help="зерно генератора для воспроизводимости")
+    parser.add_argument("--no-plot", action="store_true", help="не строить график usage_history.png")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    start_date = datetime.now() - timedelta(days=365 * args.years)
     end_date = datetime.now()
 
-    items_df = generate_items()
-    transactions_df = generate_transactions(items_df, start_date, end_date)
+    items_df = generate_items(args.items, seed=args.seed)
+    transactions_df = generate_transactions(items_df, start_date, end_date, seed=args.seed)
 
     # Сохранение в CSV
     items_df.to_csv('items.csv', index=False)
     transactions_df.to_csv('transactions.csv', index=False)
-    
+
     # Построение графика
-    plot_usage_history(transactions_df)
-    
+    if not args.no_plot:
+        plot_usage_history(transactions_df)
+
     print("Генерация данных завершена. Сохранены файлы: 'items.csv', 'transactions.csv' и 'usage_history.png'")
 
 if __name__ == "__main__":
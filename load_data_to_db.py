@@ -1,37 +1,260 @@
-import pandas as pd
-from sqlalchemy import create_engine
+import io
+import re
+import asyncio
+import argparse
+
 from datetime import datetime
+from typing import Callable, Dict, Iterator, List, NamedTuple
+
+import pandas as pd
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from configs.database import engine
+from models.item_model import ItemModel
+from models.transaction_model import TransactionModel
+from models.load_progress_model import LoadProgressModel
+from rebuild_projections import rebuild_projections, PROJECTIONS
+from utils.forecast_cache import get_forecast_cache
+
+
+def strip_item_prefix(values: pd.Series) -> pd.Series:
+    # Убираем префикс 'ITEM' и конвертируем в int
+    return values.astype(str).str.replace('ITEM', '').astype(int)
+
+
+def prepare_items(df: pd.DataFrame) -> pd.DataFrame:
+    df['item_id'] = strip_item_prefix(df['item_id'])
+    return df
+
+
+def prepare_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    # item_id в transactions хранится строкой, но без префикса, как и в items
+    df['item_id'] = strip_item_prefix(df['item_id']).astype(str)
+    df['date'] = pd.to_datetime(df['date'])
+    missing = df['quantity'].isna()
+    if missing.any():
+        raise ValueError(f"Не указано количество в строках transactions: {list(df.index[missing][:10])}")
+
+    # Дробное количество не округляем, как и API: такой файл загружать нельзя
+    fractional = df['quantity'] != df['quantity'].round()
+    if fractional.any():
+        raise ValueError(f"Дробное количество в строках transactions: {list(df.index[fractional][:10])}")
+    df['quantity'] = df['quantity'].astype(int)
+    return df
+
+
+class TableSpec(NamedTuple):
+    table: str
+    columns: List[str]
+    prepare: Callable[[pd.DataFrame], pd.DataFrame]
+
+
+TABLES: Dict[str, TableSpec] = {
+    "items": TableSpec(
+        ItemModel.__tablename__,
+        [column.name for column in ItemModel.__table__.columns],
+        prepare_items
+    ),
+    "transactions": TableSpec(
+        TransactionModel.__tablename__,
+        [column.name for column in TransactionModel.__table__.columns],
+        prepare_transactions
+    ),
+}
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Читает CSV или Parquet частями по chunk_size строк
+
+    В памяти одновременно находится только одна часть файла.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={"item_id": str})
+
+
+def copy_chunk(cursor, spec: TableSpec, df: pd.DataFrame) -> None:
+    # COPY FROM STDIN принимает всю часть одной командой, без разбора INSERT на каждую строку
+    buffer = io.StringIO()
+    df[spec.columns].to_csv(buffer, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S")
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {spec.table} ({', '.join(spec.columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+
+def save_progress(connection, table: str, source: str, rows_loaded: int, dropped_indexes=None) -> None:
+    statement = insert(LoadProgressModel).values(
+        table_name=table,
+        source=source,
+        rows_loaded=rows_loaded,
+        dropped_indexes=dropped_indexes,
+        updated_at=datetime.utcnow()
+    )
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[LoadProgressModel.table_name],
+        set_={
+            "source": statement.excluded.source,
+            "rows_loaded": statement.excluded.rows_loaded,
+            "dropped_indexes": statement.excluded.dropped_indexes,
+            "updated_at": statement.excluded.updated_at
+        }
+    ))
+
+
+def drop_indexes(connection, table: str) -> List[str]:
+    """
+    Удаляет вторичные индексы таблицы и возвращает их определения
+
+    Индексы ограничений (первичный ключ) остаются: по ним COPY
+    отклоняет повторы.
+    """
+    rows = connection.execute(text(
+        """
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.schemaname = current_schema() AND i.tablename = :table
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conrelid = CAST(:table AS regclass) AND c.conname = i.indexname
+          )
+        """
+    ), {"table": table}).all()
+
+    for name, _ in rows:
+        connection.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+    return [definition for _, definition in rows]
+
+
+def load_table(name: str, source: str, chunk_size: int, mode: str, resume: bool, rebuild_indexes: bool) -> int:
+    """
+    Загружает один файл в таблицу через COPY
+
+    После каждой части в load_progress в той же транзакции записывается
+    число загруженных строк, поэтому прерванную загрузку можно продолжить
+    с --resume без повторов и пропусков.
+
+    Returns:
+        Число строк, загруженных этим запуском
+    """
+    spec = TABLES[name]
+
+    with engine.begin() as connection:
+        progress = connection.execute(
+            select(LoadProgressModel.__table__).where(LoadProgressModel.table_name == spec.table)
+        ).first()
+
+    if resume and progress and progress.source != source:
+        raise ValueError(f"Таблица {spec.table} загружалась из {progress.source}, а не из {source}")
+
+    skip = progress.rows_loaded if resume and progress else 0
+    # Индексы, удаленные прерванным запуском, восстанавливаем в любом случае
+    dropped = progress.dropped_indexes if progress and progress.dropped_indexes else []
+
+    with engine.begin() as connection:
+        if mode == "truncate" and not skip:
+            connection.execute(text(f"TRUNCATE {spec.table}"))
+
+        if rebuild_indexes:
+            dropped = dropped + drop_indexes(connection, spec.table)
+
+        save_progress(connection, spec.table, source, skip, dropped or None)
+
+    if skip:
+        print(f"{spec.table}: продолжаем после {skip} строк")
+
+    loaded, position = 0, 0
+    for df in read_chunks(source, chunk_size):
+        # Уже загруженные части файла пропускаем целиком, последнюю - частично
+        start, position = position, position + len(df)
+        if position <= skip:
+            continue
+        df = spec.prepare(df.iloc[max(skip - start, 0):].copy())
+
+        with engine.begin() as connection:
+            copy_chunk(connection.connection.cursor(), spec, df)
+            loaded += len(df)
+            save_progress(connection, spec.table, source, skip + loaded, dropped or None)
+
+        print(f"{spec.table}: загружено {skip + loaded} строк")
+
+    with engine.begin() as connection:
+        for definition in dropped:
+            print(f"{spec.table}: восстанавливаем индекс {definition}")
+            connection.execute(text(re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX IF NOT EXISTS", definition)))
+
+        if name == "items":
+            # Явные item_id не сдвигают последовательность
+            connection.execute(text(
+                "SELECT setval(pg_get_serial_sequence('items', 'item_id'), "
+                "GREATEST((SELECT MAX(item_id) FROM items), 1))"
+            ))
+
+        connection.execute(delete(LoadProgressModel).where(LoadProgressModel.table_name == spec.table))
+        connection.execute(text(f"ANALYZE {spec.table}"))
+
+    return loaded
+
+
+def load_data_to_db(
+    sources: Dict[str, str],
+    chunk_size: int = 50000,
+    mode: str = "append",
+    resume: bool = False,
+    rebuild_indexes: bool = False
+) -> None:
+    LoadProgressModel.__table__.create(bind=engine, checkfirst=True)
+
+    for name, source in sources.items():
+        rows = load_table(name, source, chunk_size, mode, resume, rebuild_indexes)
+        print(f"Таблица {name} успешно заполнена: {rows} строк")
+
+    # COPY пишет в обход репозиториев, поэтому агрегаты пересобираем целиком
+    if "transactions" in sources:
+        asyncio.run(rebuild_projections(list(PROJECTIONS)))
+    get_forecast_cache().clear()
+
+    print("Загрузка данных завершена успешно!")
 
-from configs.database import DATABASE_URL
-
-def load_data_to_db():
-    try:
-        engine = create_engine(DATABASE_URL)
-        
-        # Загружаем данные из CSV
-        items_df = pd.read_csv('items.csv')
-        transactions_df = pd.read_csv('transactions.csv')
-        
-        # Преобразуем item_id в items_df (убираем префикс 'ITEM' и конвертируем в int)
-        items_df['item_id'] = items_df['item_id'].str.replace('ITEM', '').astype(int)
-        
-        # Обновляем item_id в transactions_df соответственно
-        transactions_df['item_id'] = transactions_df['item_id'].str.replace('ITEM', '').astype(int)
-        
-        # Преобразуем дату в правильный формат для PostgreSQL
-        transactions_df['date'] = pd.to_datetime(transactions_df['date'])
-        
-        # Загружаем данные в БД
-        items_df.to_sql('items', engine, if_exists='append', index=False)
-        print("Таблица items успешно заполнена")
-        
-        transactions_df.to_sql('transactions', engine, if_exists='append', index=False)
-        print("Таблица transactions успешно заполнена")
-        
-        print("Загрузка данных завершена успешно!")
-        
-    except Exception as e:
-        print(f"Произошла ошибка при загрузке данных: {str(e)}")
 
 if __name__ == "__main__":
-    load_data_to_db()
+    parser = argparse.ArgumentParser(description="Потоковая загрузка items и transactions через COPY")
+    parser.add_argument("--items", default="items.csv", help="CSV или Parquet с товарами")
+    parser.add_argument("--transactions", default="transactions.csv", help="CSV или Parquet с транзакциями")
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=list(TABLES),
+        help="Загрузить только указанную таблицу (можно повторять, по умолчанию все)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Строк в одной части COPY")
+    parser.add_argument(
+        "--mode",
+        choices=["append", "truncate"],
+        default="append",
+        help="append дописывает строки, truncate предварительно очищает таблицу"
+    )
+    parser.add_argument("--resume", action="store_true", help="Продолжить прерванную загрузку")
+    parser.add_argument(
+        "--drop-indexes",
+        action="store_true",
+        help="Удалить вторичные индексы на время загрузки и построить их заново в конце"
+    )
+    args = parser.parse_args()
+
+    sources = {"items": args.items, "transactions": args.transactions}
+    load_data_to_db(
+        {name: sources[name] for name in (args.only or list(TABLES))},
+        chunk_size=args.chunk_size,
+        mode=args.mode,
+        resume=args.resume,
+        rebuild_indexes=args.drop_indexes
+    )
@@ -1,27 +1,36 @@
 import logfire
 
 from fastapi import FastAPI, Depends
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from strawberry import Schema
 from strawberry.fastapi import GraphQLRouter
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 from models.base_model import init
 from middlewares.auth import basic_auth
+from middlewares.metrics import MetricsMiddleware
 from schemas.graphql.query import Query
 from schemas.graphql.mutation import Mutation
-from configs.graphql import get_graphql_context
+from configs.graphql import get_graphql_context, SerialExecutionContext
 from configs.enviroment import get_environment_variables
-from configs.database import engine
+from configs.database import engine, dispose_engines
+from utils.forecast_executor import get_forecast_executor
+from utils.metrics import configure_logging
+from utils.pagination import NEXT_CURSOR_HEADER
 
 from routers.v1.item_router import router as ItemRouter
 from routers.v1.transaction_router import router as TransactionRouter
 from routers.v1.predict_router import router as PredictRouter
+from routers.v1.stock_router import router as StockRouter
 
 # Получаем переменные окружения
 env = get_environment_variables()
 
+# Настраиваем логирование
+configure_logging()
+
 # Инициализируем FastAPI приложение
 app = FastAPI(
     title=env.APP_NAME,
@@ -35,15 +44,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Замеряем время запросов для Prometheus
+app.add_middleware(MetricsMiddleware)
+
 # Подключаем роутеры
 app.include_router(ItemRouter)
 app.include_router(TransactionRouter)
 app.include_router(PredictRouter)
+app.include_router(StockRouter)
 
 # Настраиваем GraphQL
-schema = Schema(query=Query, mutation=Mutation)
+schema = Schema(query=Query, mutation=Mutation, execution_context_class=SerialExecutionContext)
 graphql_app = GraphQLRouter(
     schema=schema,
     graphiql=env.DEBUG_MODE,
@@ -61,6 +75,16 @@ app.include_router(
 # Инициализируем модели данных
 init()
 
+# Останавливаем пул процессов прогнозирования при завершении приложения
+@app.on_event("shutdown")
+def shutdown_forecast_executor():
+    get_forecast_executor().shutdown()
+
+# Закрываем соединения асинхронных пулов БД и реплик
+@app.on_event("shutdown")
+async def dispose_database_engine():
+    await dispose_engines()
+
 # Настраиваем логирование через Logfire
 # logfire.configure(token=env.LOGFIRE_PROJECT_API_KEY)
 # logfire.instrument_fastapi(app)
@@ -70,3 +94,8 @@ init()
 @app.get("/")
 def root():
     return RedirectResponse("/docs")
+
+# Метрики в формате Prometheus
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
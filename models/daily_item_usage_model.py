@@ -0,0 +1,25 @@
+from sqlalchemy import (
+    Column, String, Date,
+    BigInteger, Float
+)
+
+from models.base_model import entity_meta
+
+
+class DailyItemUsageModel(entity_meta):
+    __tablename__ = "daily_item_usage"
+
+    item_id = Column(String(10), primary_key=True)
+    day = Column(Date, primary_key=True)
+    transaction_type = Column(String(10), primary_key=True)
+    quantity = Column(BigInteger, nullable=False, default=0)
+    value = Column(Float, nullable=False, default=0)
+
+    def normalize(self) -> dict:
+        return {
+            "item_id": self.item_id,
+            "day": self.day,
+            "transaction_type": self.transaction_type,
+            "quantity": self.quantity,
+            "value": self.value
+        }
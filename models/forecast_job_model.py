@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, Integer, String,
+    DateTime, Text, JSON, Index
+)
+
+from models.base_model import entity_meta
+
+
+class ForecastJobModel(entity_meta):
+    __tablename__ = "forecast_jobs"
+    __table_args__ = (
+        Index("ix_forecast_jobs_status_created_at", "status", "created_at"),
+    )
+
+    job_id = Column(String(36), primary_key=True)
+    status = Column(String(20), nullable=False, default="queued")
+    item_ids = Column(JSON, nullable=False)
+    prediction_days = Column(Integer, nullable=False)
+    engine = Column(String(20), nullable=False, default="prophet", server_default="prophet")
+    progress = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String(100), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def normalize(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "item_ids": self.item_ids,
+            "prediction_days": self.prediction_days,
+            "engine": self.engine,
+            "progress": self.progress,
+            "total": self.total,
+            "result": self.result,
+            "error": self.error,
+            "attempts": self.attempts,
+            "worker_id": self.worker_id,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "heartbeat_at": self.heartbeat_at,
+            "finished_at": self.finished_at
+        }
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, String, BigInteger,
+    DateTime, Text, JSON
+)
+
+from models.base_model import entity_meta
+
+
+class LoadProgressModel(entity_meta):
+    __tablename__ = "load_progress"
+
+    # One row per loaded table, written in the same transaction as each chunk
+    table_name = Column(String(100), primary_key=True)
+    source = Column(Text, nullable=False)
+    rows_loaded = Column(BigInteger, nullable=False, default=0)
+    # Definitions of indexes dropped for the load, kept until they are rebuilt
+    dropped_indexes = Column(JSON, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def normalize(self) -> dict:
+        return {
+            "table_name": self.table_name,
+            "source": self.source,
+            "rows_loaded": self.rows_loaded,
+            "dropped_indexes": self.dropped_indexes,
+            "updated_at": self.updated_at
+        }
@@ -0,0 +1,25 @@
+from sqlalchemy import (
+    Column, String, BigInteger,
+    DateTime, func
+)
+
+from models.base_model import entity_meta
+
+
+class StockBalanceModel(entity_meta):
+    __tablename__ = "stock_balances"
+
+    item_id = Column(String(10), primary_key=True)
+    quantity = Column(BigInteger, nullable=False, default=0)
+    inbound_quantity = Column(BigInteger, nullable=False, default=0)
+    outbound_quantity = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def normalize(self) -> dict:
+        return {
+            "item_id": self.item_id,
+            "quantity": self.quantity,
+            "inbound_quantity": self.inbound_quantity,
+            "outbound_quantity": self.outbound_quantity,
+            "updated_at": self.updated_at
+        }
@@ -1,21 +1,53 @@
 from sqlalchemy import (
     Column, Integer, String, 
-    Float, DateTime
+    Float, DateTime, Index
 )
 
+from sqlalchemy.orm import validates
+
 from models.base_model import entity_meta
 
 
 class TransactionModel(entity_meta):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Keyset pagination order for listings
+        Index("ix_transactions_date_transaction_id", "date", "transaction_id"),
+        # Per-item listings and per-day aggregation, answered from the index alone
+        Index(
+            "ix_transactions_item_id_date",
+            "item_id", "date", "transaction_id",
+            postgresql_include=["transaction_type", "quantity", "unit_price"]
+        ),
+        # Date range scans over append-mostly data
+        Index("ix_transactions_date_brin", "date", postgresql_using="brin"),
+    )
 
-    transaction_id = Column(String(36), primary_key=True, index=True)
+    # The primary key already has its own unique index
+    transaction_id = Column(String(36), primary_key=True)
     date = Column(DateTime, nullable=False)
     item_id = Column(String(10), nullable=False)
     transaction_type = Column(String(10), nullable=False)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float, nullable=False)
 
+    # The asyncpg driver does not coerce parameter types, while the API
+    # sends item_id as a number
+    @validates("item_id")
+    def validate_item_id(self, key, value):
+        return str(value) if value is not None else None
+
+    # Fractional quantities are rejected rather than rounded into a different amount
+    @validates("quantity")
+    def validate_quantity(self, key, value):
+        if value is None:
+            return None
+
+        if value != int(value):
+            raise ValueError(f"quantity must be a whole number, got {value}")
+
+        return int(value)
+
     def normalize(self) -> dict:
         return {
             "transaction_id": self.transaction_id,
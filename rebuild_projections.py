@@ -0,0 +1,37 @@
+import asyncio
+import argparse
+
+from configs.database import async_session_local
+from repositories.daily_item_usage_repository import DailyItemUsageRepository
+from repositories.stock_balance_repository import StockBalanceRepository
+
+# Проекции, которые можно пересобрать из таблицы transactions
+PROJECTIONS = {
+    "daily_item_usage": lambda session: DailyItemUsageRepository(session).rebuild(),
+    "stock_balances": lambda session: StockBalanceRepository(session).rebuild(),
+}
+
+
+async def rebuild_projections(names):
+    async with async_session_local() as session:
+        try:
+            for name in names:
+                rows = await PROJECTIONS[name](session)
+                await session.commit()
+                print(f"Проекция {name} пересобрана: {rows} строк")
+        except Exception:
+            await session.rollback()
+            raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересборка агрегированных таблиц из transactions")
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=list(PROJECTIONS),
+        help="Пересобрать только указанную проекцию (можно повторять, по умолчанию все)"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(rebuild_projections(args.only or list(PROJECTIONS)))
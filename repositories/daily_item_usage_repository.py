@@ -0,0 +1,121 @@
+from typing import Dict, List, Tuple
+from datetime import date
+
+from fastapi import Depends
+
+from sqlalchemy import Date, String, cast, delete, func, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+
+from models.item_model import ItemModel
+from models.transaction_model import TransactionModel
+from models.daily_item_usage_model import DailyItemUsageModel
+from repositories.repository_meta import read_only
+from configs.database import get_db_connection
+
+
+class DailyItemUsageRepository:
+
+    def __init__(self, session: AsyncSession = Depends(get_db_connection)) -> None:
+        self.session = session
+
+    async def apply(self, transaction: TransactionModel, sign: int = 1) -> None:
+        await self.apply_many([transaction], sign=sign)
+
+    async def apply_many(self, transactions: List[TransactionModel], sign: int = 1) -> None:
+        # Add (or with sign=-1 subtract) transactions to their (item, day, type) buckets.
+        # Runs in the caller's transaction, so the rollup commits together with the write.
+        # Transactions are summed per bucket first: one upsert may not touch a row twice.
+        buckets: Dict[Tuple[str, date, str], List[float]] = {}
+        for transaction in transactions:
+            key = (str(transaction.item_id), transaction.date.date(), transaction.transaction_type)
+            bucket = buckets.setdefault(key, [0, 0.0])
+            bucket[0] += sign * transaction.quantity
+            bucket[1] += sign * transaction.quantity * transaction.unit_price
+
+        if not buckets:
+            return
+
+        statement = insert(DailyItemUsageModel)
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                DailyItemUsageModel.item_id,
+                DailyItemUsageModel.day,
+                DailyItemUsageModel.transaction_type
+            ],
+            set_={
+                "quantity": DailyItemUsageModel.quantity + statement.excluded.quantity,
+                "value": DailyItemUsageModel.value + statement.excluded.value
+            }
+        )
+        await self.session.execute(statement, [
+            {"item_id": item_id, "day": day, "transaction_type": transaction_type, "quantity": quantity, "value": value}
+            for (item_id, day, transaction_type), (quantity, value) in buckets.items()
+        ])
+
+    @read_only
+    async def daily_quantities(
+        self,
+        item_ids: List[int],
+        start_date: str = None,
+        end_date: str = None
+    ) -> List[tuple]:
+        query = select(
+            DailyItemUsageModel.item_id,
+            DailyItemUsageModel.day,
+            func.sum(DailyItemUsageModel.quantity).label("quantity")
+        ).where(DailyItemUsageModel.item_id.in_([str(item_id) for item_id in item_ids]))
+
+        if start_date:
+            query = query.where(DailyItemUsageModel.day >= cast(literal(start_date, String), Date))
+
+        if end_date:
+            query = query.where(DailyItemUsageModel.day <= cast(literal(end_date, String), Date))
+
+        result = await self.session.execute(query.group_by(
+            DailyItemUsageModel.item_id, DailyItemUsageModel.day
+        ).order_by(
+            DailyItemUsageModel.item_id, DailyItemUsageModel.day
+        ))
+        return result.all()
+
+    @read_only
+    async def daily_group_quantities(self, attribute: str, groups: List[str]) -> List[tuple]:
+        # Per-day sums over all items sharing an attribute value (e.g. category),
+        # aggregated in the database so group members are never loaded one by one
+        group = getattr(ItemModel, attribute)
+        result = await self.session.execute(select(
+            group,
+            DailyItemUsageModel.day,
+            func.sum(DailyItemUsageModel.quantity).label("quantity")
+        ).join(
+            ItemModel, DailyItemUsageModel.item_id == cast(ItemModel.item_id, String)
+        ).where(group.in_(groups)).group_by(
+            group, DailyItemUsageModel.day
+        ).order_by(
+            group, DailyItemUsageModel.day
+        ))
+        return result.all()
+
+    async def rebuild(self) -> int:
+        # Block concurrent transaction writes until the caller commits,
+        # otherwise they could land between the DELETE and the INSERT
+        await self.session.execute(text("LOCK TABLE transactions IN SHARE MODE"))
+        await self.session.execute(delete(DailyItemUsageModel))
+
+        day = cast(TransactionModel.date, Date)
+        source = select(
+            TransactionModel.item_id,
+            day,
+            TransactionModel.transaction_type,
+            func.sum(TransactionModel.quantity),
+            func.sum(TransactionModel.quantity * TransactionModel.unit_price)
+        ).group_by(TransactionModel.item_id, day, TransactionModel.transaction_type)
+
+        result = await self.session.execute(
+            insert(DailyItemUsageModel).from_select(
+                ["item_id", "day", "transaction_type", "quantity", "value"],
+                source
+            )
+        )
+        return result.rowcount
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import Depends
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.forecast_job_model import ForecastJobModel
+from repositories.repository_meta import RepositoryMeta
+from configs.database import get_db_connection
+
+
+class ForecastJobRepository(RepositoryMeta[ForecastJobModel, str]):
+    model = ForecastJobModel
+
+    def __init__(self, session: AsyncSession = Depends(get_db_connection)) -> None:
+        self.session = session
+
+    async def create(self, instance: ForecastJobModel) -> ForecastJobModel:
+        self.session.add(instance)
+        await self.session.commit()
+
+        return instance
+
+    async def delete(self, id: str) -> Optional[ForecastJobModel]:
+        return await self.delete_returning(id)
+
+    async def get(self, id: str) -> ForecastJobModel:
+        return await self.session.scalar(select(ForecastJobModel).where(ForecastJobModel.job_id == id))
+
+    async def list(self, limit: int = None, start: int = None, status: str = None) -> List[ForecastJobModel]:
+        query = select(ForecastJobModel)
+
+        if status:
+            query = query.where(ForecastJobModel.status == status)
+
+        query = query.order_by(ForecastJobModel.created_at)
+
+        if start is not None:
+            query = query.offset(start)
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        result = await self.session.scalars(query)
+        return result.all()
+
+    async def update(self, id: str, instance: ForecastJobModel) -> Optional[ForecastJobModel]:
+        return await self.update_returning(id, instance.normalize())
+
+    async def claim(self, worker_id: str, stale_after: timedelta, max_attempts: int) -> ForecastJobModel:
+        # Take the oldest queued job, or a running one whose worker stopped sending
+        # heartbeats. SKIP LOCKED lets several workers poll without blocking each other.
+        now = datetime.utcnow()
+        stale = and_(
+            ForecastJobModel.status == "running",
+            ForecastJobModel.heartbeat_at < now - stale_after
+        )
+
+        # A job that has already taken down max_attempts workers would keep
+        # crashing the next one, so it is failed instead of being reclaimed
+        exhausted = (
+            select(ForecastJobModel.job_id)
+            .where(stale, ForecastJobModel.attempts >= max_attempts)
+            .with_for_update(skip_locked=True)
+        )
+        await self.session.execute(
+            update(ForecastJobModel)
+            .where(ForecastJobModel.job_id.in_(exhausted))
+            .values(
+                status="failed",
+                error=func.concat(
+                    "Задача не завершилась за ", ForecastJobModel.attempts,
+                    " попыток: воркер ", ForecastJobModel.worker_id, " перестал отвечать"
+                ),
+                finished_at=now
+            )
+        )
+
+        job = await self.session.scalar(
+            select(ForecastJobModel)
+            .where(or_(
+                ForecastJobModel.status == "queued",
+                and_(stale, ForecastJobModel.attempts < max_attempts)
+            ))
+            .order_by(ForecastJobModel.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+
+        if job:
+            job.status = "running"
+            job.progress = 0
+            job.attempts += 1
+            job.worker_id = worker_id
+            job.started_at = now
+            job.heartbeat_at = now
+
+        await self.session.commit()
+
+        return job
+
+    # Heartbeats and results are only accepted from the worker that currently owns
+    # the job, so a worker whose job was reclaimed cannot overwrite the new run
+
+    async def heartbeat(self, id: str, worker_id: str, progress: int = None) -> None:
+        values = {ForecastJobModel.heartbeat_at: datetime.utcnow()}
+
+        if progress is not None:
+            values[ForecastJobModel.progress] = progress
+
+        await self.session.execute(
+            update(ForecastJobModel).where(
+                ForecastJobModel.job_id == id,
+                ForecastJobModel.worker_id == worker_id
+            ).values(values)
+        )
+        await self.session.commit()
+
+    async def finish(self, id: str, worker_id: str, result: list = None, error: str = None) -> bool:
+        # One conditional UPDATE: an instance loaded earlier in the session would
+        # still show this worker as the owner after the job was reclaimed.
+        # Returns False if the job no longer belongs to the worker.
+        values = {
+            ForecastJobModel.status: "failed" if error else "done",
+            ForecastJobModel.result: result,
+            ForecastJobModel.error: error,
+            ForecastJobModel.finished_at: datetime.utcnow()
+        }
+
+        if not error:
+            values[ForecastJobModel.progress] = ForecastJobModel.total
+
+        outcome = await self.session.execute(
+            update(ForecastJobModel).where(
+                ForecastJobModel.job_id == id,
+                ForecastJobModel.worker_id == worker_id,
+                ForecastJobModel.status == "running"
+            ).values(values)
+        )
+        await self.session.commit()
+
+        return outcome.rowcount > 0
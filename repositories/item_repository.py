@@ -1,54 +1,93 @@
-from typing import List
+from typing import List, Optional, Tuple
 
 from fastapi import Depends
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.item_model import ItemModel
-from repositories.repository_meta import RepositoryMeta
+from repositories.repository_meta import RepositoryMeta, read_only
 from configs.database import get_db_connection
 
 
 class ItemRepository(RepositoryMeta[ItemModel, int]):
+    model = ItemModel
 
-    def __init__(self, session: Session = Depends(get_db_connection)) -> None:
+    def __init__(self, session: AsyncSession = Depends(get_db_connection)) -> None:
         self.session = session
 
-    def create(self, instance: ItemModel) -> ItemModel:
+    async def create(self, instance: ItemModel) -> ItemModel:
         self.session.add(instance)
-        self.session.commit()
-        
+        await self.session.commit()
+
         return instance
 
-    def delete(self, id: int) -> None:
-        item = self.session.query(ItemModel).filter(ItemModel.item_id == id).first()
+    async def upsert_many(self, instances: List[ItemModel]) -> Tuple[int, int]:
+        # Insert new items and overwrite existing ones in a single statement and commit.
+        # Returns (created, updated); xmax is zero only for freshly inserted rows.
+        if not instances:
+            return 0, 0
+
+        statement = insert(ItemModel)
+        statement = statement.on_conflict_do_update(
+            index_elements=[ItemModel.item_id],
+            set_={
+                column.name: statement.excluded[column.name]
+                for column in ItemModel.__table__.columns
+                if column.name != "item_id"
+            }
+        ).returning(ItemModel.item_id, literal_column("xmax = 0"))
+        result = await self.session.execute(statement, [instance.normalize() for instance in instances])
+        inserted = [row[1] for row in result.all()]
+
+        # Explicit ids bypass the serial sequence; move it past them so
+        # later single creates do not collide
+        sequence = func.pg_get_serial_sequence(ItemModel.__tablename__, "item_id")
+        await self.session.execute(select(func.setval(
+            sequence,
+            func.greatest(func.nextval(sequence), max(instance.item_id for instance in instances))
+        )))
+        await self.session.commit()
+
+        return sum(inserted), len(inserted) - sum(inserted)
+
+    async def delete(self, id: int) -> Optional[ItemModel]:
+        return await self.delete_returning(id)
 
-        if item:
-            self.session.delete(item)
-            self.session.commit()
+    @read_only
+    async def get(self, id: int) -> ItemModel:
+        return await self.session.scalar(select(ItemModel).where(ItemModel.item_id == id))
 
-    def get(self, id: int) -> ItemModel:
-        return self.session.query(ItemModel).filter(ItemModel.item_id == id).first()
+    @read_only
+    async def get_many(self, ids: List[int]) -> List[ItemModel]:
+        result = await self.session.scalars(select(ItemModel).where(ItemModel.item_id.in_(ids)))
+        return result.all()
 
-    def list(self, limit: int = None, start: int = None) -> List[ItemModel]:
-        query = self.session.query(ItemModel)
+    @read_only
+    async def list_by(self, attribute: str, values: List[str]) -> List[ItemModel]:
+        # Items whose attribute (e.g. category or supplier) is one of values
+        result = await self.session.scalars(select(ItemModel).where(getattr(ItemModel, attribute).in_(values)))
+        return result.all()
+
+    @read_only
+    async def list(self, limit: int = None, start: int = None, after: int = None) -> List[ItemModel]:
+        query = select(ItemModel)
+
+        # Keyset pagination on the primary key
+        if after is not None:
+            query = query.where(ItemModel.item_id > after)
+
+        query = query.order_by(ItemModel.item_id)
 
         if start is not None:
             query = query.offset(start)
-            
+
         if limit is not None:
             query = query.limit(limit)
 
-        return query.all()
-
-    def update(self, id: int, instance: ItemModel) -> ItemModel:
-        item = self.session.query(ItemModel).filter(ItemModel.item_id == id).first()
+        result = await self.session.scalars(query)
+        return result.all()
 
-        if item:
-            for key, value in instance.normalize().items():
-                if value is not None:
-                    setattr(item, key, value)
-            self.session.commit()
-            return item
-        
-        return None
+    async def update(self, id: int, instance: ItemModel) -> Optional[ItemModel]:
+        return await self.update_returning(id, instance.normalize())
@@ -1,5 +1,14 @@
+import inspect
+import functools
+
 from abc import abstractmethod
-from typing import Generic, List, TypeVar
+from contextlib import contextmanager
+from typing import Generic, Iterator, List, Optional, Type, TypeVar
+
+from sqlalchemy import Delete, Update, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from configs.database import READ_ONLY, PRIMARY_ONLY, PRIMARY_READS
 
 # Type definition for Model
 M = TypeVar("M")
@@ -8,32 +17,120 @@ M = TypeVar("M")
 K = TypeVar("K")
 
 
+@contextmanager
+def _read_only_session(session: AsyncSession) -> Iterator[None]:
+    # A counter, so nested read-only calls do not end the outer one
+    session.info[READ_ONLY] = session.info.get(READ_ONLY, 0) + 1
+    try:
+        yield
+    finally:
+        session.info[READ_ONLY] -= 1
+
+
+@contextmanager
+def _primary_reads(session: AsyncSession) -> Iterator[None]:
+    # Same counter scheme; unlike PRIMARY_ONLY it ends with the block
+    session.info[PRIMARY_READS] = session.info.get(PRIMARY_READS, 0) + 1
+    try:
+        yield
+    finally:
+        session.info[PRIMARY_READS] -= 1
+
+
+# Marks a repository method that only reads: its queries may go to a read replica
+def read_only(method):
+    if inspect.isasyncgenfunction(method):
+        @functools.wraps(method)
+        async def stream(self, *args, **kwargs):
+            with _read_only_session(self.session):
+                async for value in method(self, *args, **kwargs):
+                    yield value
+
+        return stream
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        with _read_only_session(self.session):
+            return await method(self, *args, **kwargs)
+
+    return wrapper
+
+
 #################################
 # Abstract Class for Repository #
 #################################
+# Implementations run on an AsyncSession, so every operation is awaitable
 class RepositoryMeta(Generic[M, K]):
 
+    # Model class and session the shared single-statement writes run on
+    model: Type[M]
+    session: AsyncSession
+
     # Create a new instance of the Model
     @abstractmethod
-    def create(self, instance: M) -> M:
+    async def create(self, instance: M) -> M:
         pass
 
-    # Delete an existing instance of the Model
+    # Delete an existing instance of the Model, returning it or None if it did not exist
     @abstractmethod
-    def delete(self, id: K) -> None:
+    async def delete(self, id: K) -> Optional[M]:
         pass
 
     # Fetch an existing instance of the Model by it's unique Id
     @abstractmethod
-    def get(self, id: K) -> M:
+    async def get(self, id: K) -> M:
         pass
 
     # Lists all existing instance of the Model
     @abstractmethod
-    def list(self, limit: int, start: int) -> List[M]:
+    async def list(self, limit: int, start: int) -> List[M]:
         pass
 
     # Updates an existing instance of the Model
     @abstractmethod
-    def update(self, id: K, instance: M) -> M:
+    async def update(self, id: K, instance: M) -> M:
         pass
+
+    # Sends every later query of the session to the primary, read-only ones included
+    def use_primary(self) -> None:
+        self.session.info[PRIMARY_ONLY] = True
+
+    # Whether the session reads only from the primary: after a write, use_primary()
+    # or a request with the read-your-writes header
+    def primary_only(self) -> bool:
+        return bool(self.session.info.get(PRIMARY_ONLY))
+
+    # Runs the reads inside the block on the primary, without pinning the rest of the session
+    def on_primary(self):
+        return _primary_reads(self.session)
+
+    def _update_statement(self, id: K, values: dict) -> Update:
+        # Partial update: None values and the primary key are left untouched.
+        # populate_existing refreshes an instance already loaded in the session
+        primary_key = self.model.__mapper__.primary_key[0]
+        values = {key: value for key, value in values.items() if value is not None and key != primary_key.key}
+
+        return (
+            update(self.model)
+            .where(primary_key == id)
+            .values(values)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+
+    def _delete_statement(self, id: K) -> Delete:
+        return delete(self.model).where(self.model.__mapper__.primary_key[0] == id).returning(self.model)
+
+    # Updates an existing instance in one UPDATE ... RETURNING, None if it does not exist
+    async def update_returning(self, id: K, values: dict) -> Optional[M]:
+        instance = await self.session.scalar(self._update_statement(id, values))
+        await self.session.commit()
+
+        return instance
+
+    # Deletes an existing instance in one DELETE ... RETURNING, None if it did not exist
+    async def delete_returning(self, id: K) -> Optional[M]:
+        instance = await self.session.scalar(self._delete_statement(id))
+        await self.session.commit()
+
+        return instance
@@ -0,0 +1,113 @@
+from typing import Dict, List
+
+from fastapi import Depends
+
+from sqlalchemy import case, delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+
+from models.transaction_model import TransactionModel
+from models.stock_balance_model import StockBalanceModel
+from repositories.repository_meta import read_only
+from configs.database import get_db_connection
+
+# Direction of each transaction type in the on-hand balance
+INBOUND = "Inbound"
+OUTBOUND = "Outbound"
+
+
+class StockBalanceRepository:
+
+    def __init__(self, session: AsyncSession = Depends(get_db_connection)) -> None:
+        self.session = session
+
+    async def apply(self, transaction: TransactionModel, sign: int = 1) -> None:
+        await self.apply_many([transaction], sign=sign)
+
+    async def apply_many(self, transactions: List[TransactionModel], sign: int = 1) -> None:
+        # Add (or with sign=-1 subtract) transactions to their items' balances.
+        # Runs in the caller's transaction, so the balance commits together with the write.
+        # Movements are summed per item first: one upsert may not touch a row twice.
+        balances: Dict[str, List[int]] = {}
+        for transaction in transactions:
+            if transaction.transaction_type not in (INBOUND, OUTBOUND):
+                continue
+            balance = balances.setdefault(str(transaction.item_id), [0, 0])
+            balance[transaction.transaction_type == OUTBOUND] += sign * transaction.quantity
+
+        if not balances:
+            return
+
+        statement = insert(StockBalanceModel).values(updated_at=func.now())
+        statement = statement.on_conflict_do_update(
+            index_elements=[StockBalanceModel.item_id],
+            set_={
+                "quantity": StockBalanceModel.quantity + statement.excluded.quantity,
+                "inbound_quantity": StockBalanceModel.inbound_quantity + statement.excluded.inbound_quantity,
+                "outbound_quantity": StockBalanceModel.outbound_quantity + statement.excluded.outbound_quantity,
+                "updated_at": statement.excluded.updated_at
+            }
+        )
+        await self.session.execute(statement, [
+            {"item_id": item_id, "quantity": inbound - outbound, "inbound_quantity": inbound, "outbound_quantity": outbound}
+            for item_id, (inbound, outbound) in balances.items()
+        ])
+
+    @read_only
+    async def get(self, item_id: int) -> StockBalanceModel:
+        return await self.session.get(StockBalanceModel, str(item_id))
+
+    @read_only
+    async def list(
+        self,
+        item_ids: List[int] = None,
+        limit: int = None,
+        start: int = None
+    ) -> List[StockBalanceModel]:
+        query = select(StockBalanceModel)
+
+        if item_ids:
+            query = query.where(StockBalanceModel.item_id.in_([str(item_id) for item_id in item_ids]))
+
+        query = query.order_by(StockBalanceModel.item_id)
+
+        if start is not None:
+            query = query.offset(start)
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        result = await self.session.scalars(query)
+        return result.all()
+
+    async def rebuild(self) -> int:
+        # Block concurrent transaction writes until the caller commits,
+        # otherwise they could land between the DELETE and the INSERT
+        await self.session.execute(text("LOCK TABLE transactions IN SHARE MODE"))
+        await self.session.execute(delete(StockBalanceModel))
+
+        inbound = func.sum(case(
+            (TransactionModel.transaction_type == INBOUND, TransactionModel.quantity),
+            else_=0
+        ))
+        outbound = func.sum(case(
+            (TransactionModel.transaction_type == OUTBOUND, TransactionModel.quantity),
+            else_=0
+        ))
+        source = select(
+            TransactionModel.item_id,
+            inbound - outbound,
+            inbound,
+            outbound,
+            func.now()
+        ).where(
+            TransactionModel.transaction_type.in_([INBOUND, OUTBOUND])
+        ).group_by(TransactionModel.item_id)
+
+        result = await self.session.execute(
+            insert(StockBalanceModel).from_select(
+                ["item_id", "quantity", "inbound_quantity", "outbound_quantity", "updated_at"],
+                source
+            )
+        )
+        return result.rowcount
@@ -1,71 +1,234 @@
-from typing import List
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+from datetime import datetime
 
 from fastapi import Depends
 
-from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, Row, Select, String, cast, literal, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.transaction_model import TransactionModel
-from repositories.repository_meta import RepositoryMeta
+from repositories.repository_meta import RepositoryMeta, read_only
+from repositories.daily_item_usage_repository import DailyItemUsageRepository
+from repositories.stock_balance_repository import StockBalanceRepository
 from configs.database import get_db_connection
 
 
 class TransactionRepository(RepositoryMeta[TransactionModel, str]):
+    model = TransactionModel
 
-    def __init__(self, session: Session = Depends(get_db_connection)) -> None:
+    # xmin is rewritten by every write of a row, so together with the key it names
+    # the row version without reading the other columns. Physical replicas share it
+    version = literal_column("xmin").label("version")
+
+    def __init__(self, session: AsyncSession = Depends(get_db_connection)) -> None:
         self.session = session
+        self.daily_usage_repository = DailyItemUsageRepository(session)
+        self.stock_balance_repository = StockBalanceRepository(session)
+
+        # Projections kept in step with every transaction write
+        self.projections = [self.daily_usage_repository, self.stock_balance_repository]
 
-    def create(self, instance: TransactionModel) -> TransactionModel:
+    async def _apply(self, transaction: TransactionModel, sign: int = 1) -> None:
+        for projection in self.projections:
+            await projection.apply(transaction, sign=sign)
+
+    async def create(self, instance: TransactionModel) -> TransactionModel:
         self.session.add(instance)
-        self.session.commit()
+        await self._apply(instance)
+        await self.session.commit()
 
         return instance
 
-    def delete(self, id: str) -> None:
-        transaction = self.session.query(TransactionModel).filter(TransactionModel.transaction_id == id).first()
+    async def create_many(self, instances: List[TransactionModel]) -> List[TransactionModel]:
+        # One multi-row INSERT and one commit for the whole batch. Rows whose
+        # transaction_id already exists are skipped and left out of the result.
+        if not instances:
+            return []
+
+        statement = (
+            insert(TransactionModel)
+            .on_conflict_do_nothing(index_elements=[TransactionModel.transaction_id])
+            .returning(TransactionModel.transaction_id)
+        )
+        result = await self.session.execute(statement, [instance.normalize() for instance in instances])
+        inserted = set(result.scalars().all())
+        created = [instance for instance in instances if instance.transaction_id in inserted]
+
+        for projection in self.projections:
+            await projection.apply_many(created)
+
+        await self.session.commit()
+
+        return created
+
+    async def delete(self, id: str) -> Optional[TransactionModel]:
+        # The deleted row comes back from DELETE ... RETURNING and is
+        # subtracted from the projections in the same transaction
+        transaction = await self.session.scalar(self._delete_statement(id))
 
         if transaction:
-            self.session.delete(transaction)
-            self.session.commit()
+            await self._apply(transaction, sign=-1)
+            await self.session.commit()
 
-    def get(self, id: str) -> TransactionModel:
-        return self.session.query(TransactionModel).filter(TransactionModel.transaction_id == id).first()
+        return transaction
 
-    def list(
-        self,
+    @read_only
+    async def get(self, id: str) -> TransactionModel:
+        return await self.session.get(TransactionModel, id)
+
+    @staticmethod
+    def _filter(query: Select, item_id: str = None, start_date: str = None, end_date: str = None) -> Select:
+        if item_id:
+            query = query.where(TransactionModel.item_id == item_id)
+
+        # Dates arrive as text; the database parses them, as the asyncpg driver
+        # accepts only datetime objects for timestamp parameters
+        if start_date:
+            query = query.where(TransactionModel.date >= cast(literal(start_date, String), DateTime))
+
+        if end_date:
+            query = query.where(TransactionModel.date <= cast(literal(end_date, String), DateTime))
+
+        return query
+
+    @classmethod
+    def _page(
+        cls,
+        query: Select,
         limit: int = None,
         start: int = None,
         item_id: str = None,
         start_date: str = None,
-        end_date: str = None
-    ) -> List[TransactionModel]:
-        query = self.session.query(TransactionModel)
-        
-        if item_id:
-            query = query.filter(TransactionModel.item_id == item_id)
-            
-        if start_date:
-            query = query.filter(TransactionModel.date >= start_date)
-            
-        if end_date:
-            query = query.filter(TransactionModel.date <= end_date)
-            
+        end_date: str = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> Select:
+        query = cls._filter(query, item_id, start_date, end_date)
+
+        # Keyset pagination: seek past the (date, transaction_id) of the previous page
+        # instead of counting skipped rows, so every page costs the same
+        if after is not None:
+            query = query.where(tuple_(TransactionModel.date, TransactionModel.transaction_id) > after)
+
+        query = query.order_by(TransactionModel.date, TransactionModel.transaction_id)
+
         if start is not None:
             query = query.offset(start)
-            
+
         if limit is not None:
             query = query.limit(limit)
-            
-        return query.all()
 
-    def update(self, id: str, instance: TransactionModel) -> TransactionModel:
-        transaction = self.session.query(TransactionModel).filter(TransactionModel.transaction_id == id).first()
+        return query
 
-        if transaction:
-            for key, value in instance.normalize().items():
-                if value is not None:
-                    setattr(transaction, key, value)
-
-            self.session.commit()
-            return transaction
-        
-        return None
+    @read_only
+    async def list(
+        self,
+        limit: int = None,
+        start: int = None,
+        item_id: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[TransactionModel]:
+        query = self._page(select(TransactionModel), limit, start, item_id, start_date, end_date, after)
+        result = await self.session.scalars(query)
+        return result.all()
+
+    @read_only
+    async def list_with_versions(
+        self,
+        limit: int = None,
+        start: int = None,
+        item_id: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[Row]:
+        # (TransactionModel, version) rows of the page
+        query = self._page(select(TransactionModel, self.version), limit, start, item_id, start_date, end_date, after)
+        result = await self.session.execute(query)
+        return result.all()
+
+    @read_only
+    async def list_versions(
+        self,
+        limit: int = None,
+        start: int = None,
+        item_id: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[Row]:
+        # (date, transaction_id, version) rows of the same page: enough to compare
+        # an ETag and build the next cursor without loading the transactions
+        query = select(TransactionModel.date, TransactionModel.transaction_id, self.version)
+        query = self._page(query, limit, start, item_id, start_date, end_date, after)
+        result = await self.session.execute(query)
+        return result.all()
+
+    @read_only
+    async def stream(
+        self,
+        chunk_size: int,
+        item_id: str = None,
+        start_date: str = None,
+        end_date: str = None
+    ) -> AsyncIterator[Sequence[Row]]:
+        # Plain column rows instead of ORM objects, fetched through a server-side
+        # cursor chunk_size rows at a time, so memory does not grow with the result
+        query = self._filter(select(*TransactionModel.__table__.columns), item_id, start_date, end_date)
+        query = query.order_by(TransactionModel.date, TransactionModel.transaction_id)
+
+        result = await self.session.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            yield partition
+
+    @read_only
+    async def daily_usage(
+        self,
+        item_ids: List[int],
+        start_date: str = None,
+        end_date: str = None
+    ) -> List[tuple]:
+        # Read per-day sums from the daily_item_usage rollup instead of scanning transactions
+        return await self.daily_usage_repository.daily_quantities(
+            item_ids,
+            start_date=start_date,
+            end_date=end_date
+        )
+
+    @read_only
+    async def daily_group_usage(self, attribute: str, groups: List[str]) -> List[tuple]:
+        return await self.daily_usage_repository.daily_group_quantities(attribute, groups)
+
+    async def update(self, id: str, instance: TransactionModel) -> Optional[TransactionModel]:
+        result = await self.update_with_previous(id, instance)
+        return result[1] if result else None
+
+    async def update_with_previous(
+        self,
+        id: str,
+        instance: TransactionModel
+    ) -> Optional[Tuple[TransactionModel, TransactionModel]]:
+        # The CTE locks the row and returns its values as they were before the
+        # UPDATE, so the projections get both versions from a single statement.
+        # Returns (previous, updated), or None if the transaction does not exist
+        previous = select(*TransactionModel.__table__.columns).where(
+            TransactionModel.transaction_id == id
+        ).with_for_update().cte("previous")
+
+        statement = self._update_statement(id, instance.normalize())
+        statement = statement.where(TransactionModel.transaction_id == previous.c.transaction_id)
+        row = (await self.session.execute(statement.returning(*previous.c))).first()
+
+        if row is None:
+            return None
+
+        updated, previous_values = row[0], row[1:]
+        previous_transaction = TransactionModel(**dict(zip(previous.c.keys(), previous_values)))
+
+        await self._apply(previous_transaction, sign=-1)
+        await self._apply(updated)
+        await self.session.commit()
+
+        return previous_transaction, updated
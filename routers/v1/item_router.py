@@ -1,11 +1,20 @@
-from typing import List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 
 from services.item_service import ItemService
+from services.stock_service import StockService
 from models.item_model import ItemModel
 from schemas.pydantic.item_schema import ItemSchema
+from schemas.pydantic.stock_schema import StockBalanceSchema
+from schemas.pydantic.bulk_schema import BulkResultSchema
 from middlewares.auth import token_auth
+from configs.enviroment import get_environment_variables
+from utils.bulk import validate_rows
+from utils.etag import make_etag, etag_matches
+from utils.pagination import NEXT_CURSOR_HEADER
+
+env = get_environment_variables()
 
 router = APIRouter(
     prefix="/api/v1/items",
@@ -17,29 +26,92 @@ router = APIRouter(
 @router.post("", response_model=ItemSchema, status_code=status.HTTP_201_CREATED)
 async def create_item(item: ItemSchema, service: ItemService = Depends()) -> ItemSchema:
     item_model = ItemModel(**item.model_dump())
-    return service.create_item(item_model)
+    return await service.create_item(item_model)
+
+
+@router.post("/bulk", response_model=BulkResultSchema)
+async def upsert_items(items: List[Dict[str, Any]], service: ItemService = Depends()) -> BulkResultSchema:
+    if len(items) > env.BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {env.BULK_MAX_ROWS} rows"
+        )
+
+    valid, errors = validate_rows(items, ItemSchema, lambda i: i.item_id)
+    created, updated = await service.upsert_items([ItemModel(**item.model_dump()) for _, item in valid])
+
+    return BulkResultSchema(created=created, updated=updated, errors=errors)
 
 
 @router.get("/{item_id}", response_model=ItemSchema)
-async def get_item(item_id: int, service: ItemService = Depends()) -> ItemSchema:
-    item = service.get_item(item_id)
+async def get_item(
+    item_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    service: ItemService = Depends()
+) -> ItemSchema:
+    item = await service.get_item(item_id)
 
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Item with id {item_id} not found"
         )
-    
+
+    # Клиенту с той же строкой тело не отправляем
+    etag = make_etag([item])
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
     return item
 
 
+@router.get("/{item_id}/stock", response_model=StockBalanceSchema)
+async def get_item_stock(
+    item_id: int,
+    service: ItemService = Depends(),
+    stock_service: StockService = Depends()
+) -> StockBalanceSchema:
+    stock = await stock_service.get_stock(item_id)
+
+    if stock:
+        return stock
+
+    # Товар без движений есть в справочнике, но еще не попал в проекцию остатков
+    if not await service.get_item(item_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Item with id {item_id} not found"
+        )
+
+    return StockBalanceSchema(item_id=item_id, quantity=0, inbound_quantity=0, outbound_quantity=0)
+
+
 @router.get("", response_model=List[ItemSchema])
 async def list_items(
+    response: Response,
     limit: int = None,
     start: int = None,
+    cursor: str = None,
+    if_none_match: Optional[str] = Header(default=None),
     service: ItemService = Depends()
 ) -> List[ItemSchema]:
-    return service.list_items(limit=limit, start=start)
+    try:
+        page = await service.list_items(limit=limit, start=start, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    headers = {"ETag": make_etag(page.items)}
+    if page.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = page.next_cursor
+
+    # Клиенту с той же страницей тело не отправляем
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return page.items
 
 
 @router.put("/{item_id}", response_model=ItemSchema)
@@ -49,7 +121,7 @@ async def update_item(
     service: ItemService = Depends()
 ) -> ItemSchema:
     item_model = ItemModel(**item.model_dump())
-    updated_item = service.update_item(item_id, item_model)
+    updated_item = await service.update_item(item_id, item_model)
 
     if not updated_item:
         raise HTTPException(
@@ -62,12 +134,10 @@ async def update_item(
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_item(item_id: int, service: ItemService = Depends()) -> None:
-    item = service.get_item(item_id)
+    deleted_item = await service.delete_item(item_id)
 
-    if not item:
+    if not deleted_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Item with id {item_id} not found"
         )
-
-    service.delete_item(item_id)
@@ -1,16 +1,17 @@
-import pandas as pd
-
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Header, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from configs.database import get_db_connection
 from middlewares.auth import token_auth
-from services.item_service import ItemService
-from services.transaction_service import TransactionService
-from utils.predict import prepare_data_from_db, predict_usage
+from services.forecast_service import ForecastService
+from services.forecast_job_service import ForecastJobService
+from utils.predict import MAX_PREDICTION_DAYS
 from schemas.pydantic.prediction_schema import (
     PredictionRequestSchema,
     PredictionResponseSchema,
-    PredictionDataSchema
+    ForecastJobSchema
 )
 
 router = APIRouter(
@@ -20,97 +21,114 @@ router = APIRouter(
 )
 
 
+def validate_prediction_days(prediction_days: int) -> None:
+    if not 1 <= prediction_days <= MAX_PREDICTION_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Количество дней для прогнозирования должно быть от 1 до {MAX_PREDICTION_DAYS}"
+        )
+
+
+def validate_hierarchy(request: PredictionRequestSchema) -> None:
+    if request.reconcile and request.hierarchy is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Параметр reconcile применяется только вместе с hierarchy"
+        )
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def stream_predictions(
+    request: PredictionRequestSchema,
+    service: ForecastService,
+    session: AsyncSession
+) -> StreamingResponse:
+    # Каждая строка - PredictionResponseSchema товара, отправляется сразу после расчета
+    async def lines():
+        try:
+            async for response in service.stream(
+                request.item_ids,
+                request.prediction_days,
+                engine=request.engine,
+                hierarchy=request.hierarchy,
+                reconcile=request.reconcile
+            ):
+                yield response.model_dump_json() + "\n"
+        finally:
+            # Зависимость закрывает сессию до отправки тела ответа, а поток
+            # открывает ее заново, поэтому соединение возвращаем в пул сами
+            await session.close()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
 @router.post("/", response_model=List[PredictionResponseSchema])
 async def create_predictions(
     request: PredictionRequestSchema,
-    item_service: ItemService = Depends(),
-    transaction_service: TransactionService = Depends()
+    service: ForecastService = Depends(),
+    session: AsyncSession = Depends(get_db_connection),
+    accept: Optional[str] = Header(default=None)
 ):
-    if not 1 <= request.prediction_days <= 365:
-        raise HTTPException(
-            status_code=400,
-            detail="Количество дней для прогнозирования должно быть от 1 до 365"
-        )
+    validate_prediction_days(request.prediction_days)
+    validate_hierarchy(request)
+
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return stream_predictions(request, service, session)
 
-    responses = []
-    
     try:
-        # Получаем все транзакции
-        transactions = transaction_service.list_transactions()
-        if not transactions:
-            raise HTTPException(
-                status_code=400,
-                detail="Нет данных о транзакциях"
-            )
-        transactions_df = pd.DataFrame([t.normalize() for t in transactions])
-        
-        # Добавляем проверку данных
-        print(f"Transactions shape: {transactions_df.shape}")
-        print(f"Transactions columns: {transactions_df.columns}")
-        print(f"Transactions date range: {transactions_df['date'].min()} - {transactions_df['date'].max()}")
-        
-        # Получаем все товары
-        items = item_service.list_items()
-        if not items:
-            raise HTTPException(
-                status_code=400,
-                detail="Нет данных о товарах"
-            )
-        items_df = pd.DataFrame([i.normalize() for i in items])
-        
-        # Подготавливаем данные из БД
-        daily_usage = prepare_data_from_db(transactions_df, items_df)
-        
-        for item_id in request.item_ids:
-            try:
-                # Получаем информацию о товаре
-                item = item_service.get_item(item_id)
-                if not item:
-                    raise HTTPException(status_code=404, detail=f"Товар с ID {item_id} не найден")
-                
-                # Получаем данные для конкретного товара
-                item_data = daily_usage[daily_usage['item_name'] == item.item_name].copy()
-                if len(item_data) < 2:
-                    raise ValueError("Недостаточно данных для прогнозирования")
-                
-                # Подготавливаем данные для Prophet
-                item_data.columns = ['ds', 'item_name', 'y']
-                
-                # Прогнозирование
-                forecast = predict_usage(daily_usage, item.item_name, periods=request.prediction_days)
-                
-                # Преобразуем прогноз в список PredictionData
-                predictions = []
-                last_date = item_data['ds'].max()
-                future_forecast = forecast[forecast['ds'] > last_date]
-                
-                for _, row in future_forecast.iterrows():
-                    predictions.append(PredictionDataSchema(
-                        date=row['ds'],
-                        predicted_quantity=max(0, float(row['yhat'])),
-                        lower_bound=max(0, float(row['yhat_lower'])),
-                        upper_bound=max(0, float(row['yhat_upper']))
-                    ))
-                
-                responses.append(PredictionResponseSchema(
-                    item_id=item_id,
-                    item_name=item.item_name,
-                    predictions=predictions,
-                    status="success"
-                ))
-            except Exception as e:
-                responses.append(PredictionResponseSchema(
-                    item_id=item_id,
-                    item_name=item.item_name if item else "Unknown",
-                    predictions=[],
-                    status="error",
-                    error=str(e)
-                ))
-                
+        return await service.predict(
+            request.item_ids,
+            request.prediction_days,
+            engine=request.engine,
+            hierarchy=request.hierarchy,
+            reconcile=request.reconcile
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Ошибка при подготовке данных: {str(e)}"
         )
 
-    return responses
+
+@router.post("/stream", response_class=StreamingResponse)
+async def stream_predictions_route(
+    request: PredictionRequestSchema,
+    service: ForecastService = Depends(),
+    session: AsyncSession = Depends(get_db_connection)
+) -> StreamingResponse:
+    validate_prediction_days(request.prediction_days)
+    validate_hierarchy(request)
+
+    return stream_predictions(request, service, session)
+
+
+@router.post("/jobs", response_model=ForecastJobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def create_prediction_job(
+    request: PredictionRequestSchema,
+    service: ForecastJobService = Depends()
+) -> ForecastJobSchema:
+    validate_prediction_days(request.prediction_days)
+
+    # Задачи хранят только движок, иерархический режим доступен в синхронных запросах
+    if request.hierarchy is not None:
+        raise HTTPException(
+            status_code=400,
+            detail="Иерархический режим не поддерживается для фоновых задач"
+        )
+
+    return await service.create_job(request.item_ids, request.prediction_days, engine=request.engine)
+
+
+@router.get("/jobs/{job_id}", response_model=ForecastJobSchema)
+async def get_prediction_job(job_id: str, service: ForecastJobService = Depends()) -> ForecastJobSchema:
+    job = await service.get_job(job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Задача прогнозирования {job_id} не найдена"
+        )
+
+    return job
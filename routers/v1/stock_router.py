@@ -0,0 +1,23 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+
+from services.stock_service import StockService
+from schemas.pydantic.stock_schema import StockBalanceSchema
+from middlewares.auth import token_auth
+
+router = APIRouter(
+    prefix="/api/v1/stock",
+    tags=["stock"],
+    dependencies=[Depends(token_auth)]
+)
+
+
+@router.get("", response_model=List[StockBalanceSchema])
+async def list_stock(
+    item_ids: List[int] = Query(default=None),
+    limit: int = None,
+    start: int = None,
+    service: StockService = Depends()
+) -> List[StockBalanceSchema]:
+    return await service.list_stock(item_ids=item_ids, limit=limit, start=start)
@@ -1,11 +1,22 @@
-from typing import List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.transaction_service import TransactionService
 from models.transaction_model import TransactionModel
 from schemas.pydantic.transaction_schema import TransactionSchema
+from schemas.pydantic.bulk_schema import BulkErrorSchema, BulkResultSchema
 from middlewares.auth import token_auth
+from configs.database import get_db_connection
+from configs.enviroment import get_environment_variables
+from utils.bulk import validate_rows
+from utils.etag import make_etag, etag_matches
+from utils.export import EXPORT_FORMATS, arrow_schema
+from utils.pagination import NEXT_CURSOR_HEADER, Page
+
+env = get_environment_variables()
 
 router = APIRouter(
     prefix="/api/v1/transactions",
@@ -17,48 +28,153 @@ router = APIRouter(
 @router.post("", response_model=TransactionSchema, status_code=status.HTTP_201_CREATED)
 async def create_transaction(transaction: TransactionSchema, service: TransactionService = Depends()) -> TransactionSchema:
     transaction_model = TransactionModel(**transaction.model_dump())
-    return service.create_transaction(transaction_model)
+    return await service.create_transaction(transaction_model)
+
+
+@router.post("/bulk", response_model=BulkResultSchema)
+async def create_transactions(
+    transactions: List[Dict[str, Any]],
+    service: TransactionService = Depends()
+) -> BulkResultSchema:
+    if len(transactions) > env.BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {env.BULK_MAX_ROWS} rows"
+        )
+
+    valid, errors = validate_rows(transactions, TransactionSchema, lambda t: t.transaction_id)
+    created = await service.create_transactions([
+        TransactionModel(**transaction.model_dump()) for _, transaction in valid
+    ])
+
+    created_ids = {transaction.transaction_id for transaction in created}
+    errors.extend(
+        BulkErrorSchema(index=index, error=f"Transaction with id {transaction.transaction_id} already exists")
+        for index, transaction in valid
+        if transaction.transaction_id not in created_ids
+    )
+
+    return BulkResultSchema(created=len(created), errors=sorted(errors, key=lambda e: e.index))
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_transactions(
+    format: str = "csv",
+    item_id: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    service: TransactionService = Depends(),
+    session: AsyncSession = Depends(get_db_connection)
+) -> StreamingResponse:
+    export_format = EXPORT_FORMATS.get(format)
+
+    if not export_format:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format {format}, expected one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    chunks = service.export_transactions(
+        env.EXPORT_CHUNK_SIZE,
+        item_id=item_id,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    async def body():
+        try:
+            async for data in export_format.encode(chunks, arrow_schema(TransactionModel.__table__.columns)):
+                yield data
+        finally:
+            # Зависимость закрывает сессию до отправки тела ответа, а курсор
+            # открывает ее заново, поэтому соединение возвращаем в пул сами
+            await session.close()
+
+    return StreamingResponse(
+        body(),
+        media_type=export_format.media_type,
+        headers={"Content-Disposition": f"attachment; filename=transactions.{export_format.extension}"}
+    )
 
 
 @router.get("/{transaction_id}", response_model=TransactionSchema)
-async def get_transaction(transaction_id: int, service: TransactionService = Depends()) -> TransactionSchema:
-    transaction = service.get_transaction(transaction_id)
+async def get_transaction(
+    transaction_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    service: TransactionService = Depends()
+) -> TransactionSchema:
+    transaction = await service.get_transaction(transaction_id)
 
     if not transaction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Transaction with id {transaction_id} not found"
         )
-    
+
+    # Клиенту с той же строкой тело не отправляем
+    etag = make_etag([tuple(transaction.normalize().values())])
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
     return transaction
 
 
+def _page_headers(page: Page) -> Dict[str, str]:
+    headers = {"ETag": make_etag(page.versions)}
+    if page.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return headers
+
+
 @router.get("", response_model=List[TransactionSchema])
 async def list_transactions(
+    response: Response,
     limit: int = None,
     start: int = None,
     item_id: str = None,
     start_date: str = None,
     end_date: str = None,
+    cursor: str = None,
+    if_none_match: Optional[str] = Header(default=None),
     service: TransactionService = Depends()
 ) -> List[TransactionSchema]:
-    return service.list_transactions(
+    query = dict(
         limit=limit,
         start=start,
         item_id=item_id,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        cursor=cursor
     )
 
+    try:
+        # Клиенту с той же страницей тело не отправляем: для сверки хватает
+        # версий строк, а сами транзакции читаются, только если ETag не совпал
+        if if_none_match:
+            versions = await service.list_transaction_versions(**query)
+            headers = _page_headers(versions)
+            if etag_matches(if_none_match, headers["ETag"]):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        page = await service.list_transactions(**query)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # ETag отдаваемой страницы считается по версиям тех же строк, что в теле
+    response.headers.update(_page_headers(page))
+    return page.items
+
 
 @router.put("/{transaction_id}", response_model=TransactionSchema)
 async def update_transaction(
-    transaction_id: int,
+    transaction_id: str,
     transaction: TransactionSchema,
     service: TransactionService = Depends()
 ) -> TransactionSchema:
     transaction_model = TransactionModel(**transaction.model_dump())
-    updated_transaction = service.update_transaction(transaction_id, transaction_model)
+    updated_transaction = await service.update_transaction(transaction_id, transaction_model)
 
     if not updated_transaction:
         raise HTTPException(
@@ -70,13 +186,11 @@ async def update_transaction(
 
 
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_transaction(transaction_id: int, service: TransactionService = Depends()) -> None:
-    transaction = service.get_transaction(transaction_id)
+async def delete_transaction(transaction_id: str, service: TransactionService = Depends()) -> None:
+    deleted_transaction = await service.delete_transaction(transaction_id)
 
-    if not transaction:
+    if not deleted_transaction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Transaction with id {transaction_id} not found"
         )
-
-    service.delete_transaction(transaction_id)
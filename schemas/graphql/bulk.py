@@ -0,0 +1,26 @@
+import strawberry
+
+from typing import List
+
+from schemas.pydantic.bulk_schema import BulkResultSchema
+
+
+@strawberry.type
+class BulkError:
+    index: int
+    error: str
+
+
+@strawberry.type
+class BulkResult:
+    created: int
+    updated: int
+    errors: List[BulkError]
+
+    @classmethod
+    def from_schema(cls, result: BulkResultSchema) -> "BulkResult":
+        return cls(
+            created=result.created,
+            updated=result.updated,
+            errors=[BulkError(index=error.index, error=error.error) for error in result.errors]
+        )
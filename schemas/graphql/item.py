@@ -1,6 +1,8 @@
 import strawberry
 
-from typing import Optional
+from typing import List, Optional
+
+from models.item_model import ItemModel
 
 
 @strawberry.type
@@ -15,6 +17,16 @@ class Item:
     storage_condition: str
     shelf_life_days: int
 
+    @classmethod
+    def from_model(cls, model: ItemModel) -> "Item":
+        return cls(**model.normalize())
+
+
+@strawberry.type
+class ItemPage:
+    items: List[Item]
+    next_cursor: Optional[str]
+
 
 @strawberry.input
 class ItemInput:
@@ -28,6 +40,11 @@ class ItemInput:
     shelf_life_days: int
 
 
+@strawberry.input
+class ItemUpsertInput(ItemInput):
+    item_id: int
+
+
 @strawberry.input
 class ItemUpdate:
     item_id: int
@@ -1,54 +1,89 @@
+import uuid
 import strawberry
 from strawberry.types import Info
 
-from typing import Optional
+from typing import List, Optional
 
 from models.item_model import ItemModel
 from models.transaction_model import TransactionModel
 from configs.graphql import get_item_service, get_transaction_service
-from schemas.graphql.item import Item, ItemInput
+from schemas.graphql.bulk import BulkResult
+from schemas.graphql.item import Item, ItemInput, ItemUpsertInput
 from schemas.graphql.transaction import Transaction, TransactionInput
+from schemas.pydantic.bulk_schema import BulkErrorSchema, BulkResultSchema
+from schemas.pydantic.item_schema import ItemSchema
+from schemas.pydantic.transaction_schema import TransactionSchema
+from utils.bulk import validate_rows
 
 
 @strawberry.type
 class Mutation:
     
     @strawberry.mutation
-    def create_item(self, item: ItemInput, info: Info) -> Item:
+    async def create_item(self, item: ItemInput, info: Info) -> Item:
         service = get_item_service(info)
         item_model = ItemModel(**item.__dict__)
-        created_item = service.create_item(item_model)
+        created_item = await service.create_item(item_model)
         return Item.from_model(created_item)
 
     @strawberry.mutation
-    def update_item(self, id: int, item: ItemInput, info: Info) -> Optional[Item]:
+    async def upsert_items(self, items: List[ItemUpsertInput], info: Info) -> BulkResult:
+        service = get_item_service(info)
+        valid, errors = validate_rows([item.__dict__ for item in items], ItemSchema, lambda i: i.item_id)
+        created, updated = await service.upsert_items([ItemModel(**item.model_dump()) for _, item in valid])
+        return BulkResult.from_schema(BulkResultSchema(created=created, updated=updated, errors=errors))
+
+    @strawberry.mutation
+    async def update_item(self, id: int, item: ItemInput, info: Info) -> Optional[Item]:
         service = get_item_service(info)
         item_model = ItemModel(**item.__dict__)
-        updated_item = service.update_item(id, item_model)
+        updated_item = await service.update_item(id, item_model)
         return Item.from_model(updated_item) if updated_item else None
 
     @strawberry.mutation
-    def delete_item(self, id: int, info: Info) -> bool:
+    async def delete_item(self, id: int, info: Info) -> bool:
         service = get_item_service(info)
-        service.delete_item(id)
-        return True
+        return await service.delete_item(id) is not None
 
     @strawberry.mutation
-    def create_transaction(self, transaction: TransactionInput, info: Info) -> Transaction:
+    async def create_transaction(self, transaction: TransactionInput, info: Info) -> Transaction:
         service = get_transaction_service(info)
         transaction_model = TransactionModel(**transaction.__dict__)
-        created_transaction = service.create_transaction(transaction_model)
+        created_transaction = await service.create_transaction(transaction_model)
         return Transaction.from_model(created_transaction)
 
     @strawberry.mutation
-    def update_transaction(self, id: str, transaction: TransactionInput, info: Info) -> Optional[Transaction]:
+    async def create_transactions(self, transactions: List[TransactionInput], info: Info) -> BulkResult:
+        service = get_transaction_service(info)
+        # Транзакции без идентификатора получают новый uuid
+        rows = [
+            {**transaction.__dict__, "transaction_id": transaction.transaction_id or str(uuid.uuid4())}
+            for transaction in transactions
+        ]
+        valid, errors = validate_rows(rows, TransactionSchema, lambda t: t.transaction_id)
+        created = await service.create_transactions([
+            TransactionModel(**transaction.model_dump()) for _, transaction in valid
+        ])
+
+        created_ids = {transaction.transaction_id for transaction in created}
+        errors.extend(
+            BulkErrorSchema(index=index, error=f"Transaction with id {transaction.transaction_id} already exists")
+            for index, transaction in valid
+            if transaction.transaction_id not in created_ids
+        )
+
+        return BulkResult.from_schema(
+            BulkResultSchema(created=len(created), errors=sorted(errors, key=lambda e: e.index))
+        )
+
+    @strawberry.mutation
+    async def update_transaction(self, id: str, transaction: TransactionInput, info: Info) -> Optional[Transaction]:
         service = get_transaction_service(info)
         transaction_model = TransactionModel(**transaction.__dict__)
-        updated_transaction = service.update_transaction(id, transaction_model)
+        updated_transaction = await service.update_transaction(id, transaction_model)
         return Transaction.from_model(updated_transaction) if updated_transaction else None
 
     @strawberry.mutation
-    def delete_transaction(self, id: str, info: Info) -> bool:
+    async def delete_transaction(self, id: str, info: Info) -> bool:
         service = get_transaction_service(info)
-        service.delete_transaction(id)
-        return True
+        return await service.delete_transaction(id) is not None
@@ -3,52 +3,92 @@ from strawberry.types import Info
 
 from typing import List, Optional
 
-from schemas.graphql.item import Item
-from schemas.graphql.transaction import Transaction
+from schemas.graphql.item import Item, ItemPage
+from schemas.graphql.transaction import Transaction, TransactionPage
 from configs.graphql import get_item_service, get_transaction_service
 
 
 @strawberry.type
 class Query:
     @strawberry.field
-    def item(self, id: int, info: Info) -> Optional[Item]:
+    async def item(self, id: int, info: Info) -> Optional[Item]:
         service = get_item_service(info)
-        item = service.get_item(id)
+        item = await service.get_item(id)
         return Item.from_model(item) if item else None
 
     @strawberry.field
-    def items(
+    async def items(
         self,
         limit: Optional[int] = None,
         start: Optional[int] = None,
+        cursor: Optional[str] = None,
         info: Info = None
     ) -> List[Item]:
         service = get_item_service(info)
-        items = service.list_items(limit=limit, start=start)
-        return [Item.from_model(item) for item in items]
+        page = await service.list_items(limit=limit, start=start, cursor=cursor)
+        return [Item.from_model(item) for item in page.items]
 
     @strawberry.field
-    def transaction(self, id: str, info: Info) -> Optional[Transaction]:
+    async def items_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        info: Info = None
+    ) -> ItemPage:
+        service = get_item_service(info)
+        page = await service.list_items(limit=limit, cursor=cursor)
+        return ItemPage(
+            items=[Item.from_model(item) for item in page.items],
+            next_cursor=page.next_cursor
+        )
+
+    @strawberry.field
+    async def transaction(self, id: str, info: Info) -> Optional[Transaction]:
         service = get_transaction_service(info)
-        transaction = service.get_transaction(id)
+        transaction = await service.get_transaction(id)
         return Transaction.from_model(transaction) if transaction else None
 
     @strawberry.field
-    def transactions(
+    async def transactions(
         self,
         limit: Optional[int] = None,
         start: Optional[int] = None,
         item_id: Optional[str] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
+        cursor: Optional[str] = None,
         info: Info = None
     ) -> List[Transaction]:
         service = get_transaction_service(info)
-        transactions = service.list_transactions(
+        page = await service.list_transactions(
             limit=limit,
             start=start,
             item_id=item_id,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            cursor=cursor
+        )
+        return [Transaction.from_model(transaction) for transaction in page.items]
+
+    @strawberry.field
+    async def transactions_page(
+        self,
+        limit: int,
+        item_id: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        cursor: Optional[str] = None,
+        info: Info = None
+    ) -> TransactionPage:
+        service = get_transaction_service(info)
+        page = await service.list_transactions(
+            limit=limit,
+            item_id=item_id,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor
+        )
+        return TransactionPage(
+            items=[Transaction.from_model(transaction) for transaction in page.items],
+            next_cursor=page.next_cursor
         )
-        return [Transaction.from_model(transaction) for transaction in transactions]
@@ -1,8 +1,10 @@
 import strawberry
 
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+from models.transaction_model import TransactionModel
+
 
 @strawberry.type
 class Transaction:
@@ -13,6 +15,16 @@ class Transaction:
     quantity: int
     unit_price: float
 
+    @classmethod
+    def from_model(cls, model: TransactionModel) -> "Transaction":
+        return cls(**model.normalize())
+
+
+@strawberry.type
+class TransactionPage:
+    items: List[Transaction]
+    next_cursor: Optional[str]
+
 
 @strawberry.input
 class TransactionInput:
@@ -21,6 +33,7 @@ class TransactionInput:
     transaction_type: str
     quantity: int
     unit_price: float
+    transaction_id: Optional[str] = None
 
 
 @strawberry.input
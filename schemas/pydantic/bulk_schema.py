@@ -0,0 +1,14 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class BulkErrorSchema(BaseModel):
+    index: int
+    error: str
+
+
+class BulkResultSchema(BaseModel):
+    created: int
+    updated: int = 0
+    errors: List[BulkErrorSchema] = []
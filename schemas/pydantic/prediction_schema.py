@@ -1,11 +1,14 @@
 from datetime import datetime
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 
 class PredictionRequestSchema(BaseModel):
     item_ids: List[int]
     prediction_days: int = 365
+    engine: Literal["prophet", "fast"] = "prophet"
+    hierarchy: Optional[Literal["category", "supplier"]] = None
+    reconcile: bool = False
 
 
 class PredictionDataSchema(BaseModel):
@@ -21,3 +24,21 @@ class PredictionResponseSchema(BaseModel):
     predictions: List[PredictionDataSchema]
     status: str
     error: Optional[str] = None
+
+
+class ForecastJobSchema(BaseModel):
+    job_id: str
+    status: str
+    item_ids: List[int]
+    prediction_days: int
+    engine: str
+    progress: int
+    total: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[List[PredictionResponseSchema]] = None
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,15 @@
+from typing import Optional
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class StockBalanceSchema(BaseModel):
+    item_id: int
+    quantity: int
+    inbound_quantity: int
+    outbound_quantity: int
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
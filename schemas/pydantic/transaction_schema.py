@@ -7,7 +7,7 @@ class TransactionSchema(BaseModel):
     date: datetime
     item_id: int
     transaction_type: str
-    quantity: float
+    quantity: int
     unit_price: float
 
     class Config:
@@ -0,0 +1,33 @@
+import uuid
+
+from typing import List
+
+from fastapi import Depends
+
+from models.forecast_job_model import ForecastJobModel
+from repositories.forecast_job_repository import ForecastJobRepository
+
+
+class ForecastJobService:
+
+    def __init__(self, repository: ForecastJobRepository = Depends(ForecastJobRepository)) -> None:
+        self.repository = repository
+
+    async def create_job(self, item_ids: List[int], prediction_days: int, engine: str = "prophet") -> ForecastJobModel:
+        job = ForecastJobModel(
+            job_id=str(uuid.uuid4()),
+            status="queued",
+            item_ids=item_ids,
+            prediction_days=prediction_days,
+            engine=engine,
+            progress=0,
+            total=len(set(item_ids)),
+            attempts=0
+        )
+        return await self.repository.create(job)
+
+    async def get_job(self, id: str) -> ForecastJobModel:
+        return await self.repository.get(id)
+
+    async def list_jobs(self, limit: int = None, start: int = None, status: str = None) -> List[ForecastJobModel]:
+        return await self.repository.list(limit=limit, start=start, status=status)
@@ -0,0 +1,370 @@
+import asyncio
+import numpy as np
+
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import Depends
+
+from services.item_service import ItemService
+from services.transaction_service import TransactionService
+from utils.predict import prepare_data_from_db, forecast_item, PROPHET_CONFIG
+from utils.holiday_calendar import get_holidays
+from utils.fast_forecast import forecast_items_fast, fit_predict, FAST_CONFIG
+from utils.hierarchy import (
+    sum_by_group, recent_shares, forecast_proportions,
+    disaggregate, forecast_group, to_responses
+)
+from utils.usage_matrix import DailyUsageMatrix
+from utils.model_registry import ModelRegistry, get_model_registry
+from utils.forecast_cache import ForecastCache, get_forecast_cache
+from utils.forecast_executor import ForecastExecutor, get_forecast_executor
+from utils.metrics import observe_stage, observe_stages, FORECAST_REQUEST_ITEMS, FORECAST_ITEMS
+from schemas.pydantic.prediction_schema import PredictionResponseSchema
+
+# Ключ конфигурации каждого движка для кэша прогнозов
+ENGINE_CONFIGS = {
+    "prophet": PROPHET_CONFIG,
+    "fast": FAST_CONFIG
+}
+
+
+class ForecastService:
+
+    def __init__(
+        self,
+        item_service: ItemService = Depends(),
+        transaction_service: TransactionService = Depends(),
+        registry: ModelRegistry = Depends(get_model_registry),
+        executor: ForecastExecutor = Depends(get_forecast_executor),
+        cache: ForecastCache = Depends(get_forecast_cache)
+    ) -> None:
+        self.item_service = item_service
+        self.transaction_service = transaction_service
+        self.registry = registry
+        self.executor = executor
+        self.cache = cache
+
+    async def predict(
+        self,
+        item_ids: List[int],
+        prediction_days: int,
+        engine: str = "prophet",
+        on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+        hierarchy: Optional[str] = None,
+        reconcile: bool = False
+    ) -> List[PredictionResponseSchema]:
+        # Собираем потоковые результаты и возвращаем их в порядке запроса
+        total = len(set(item_ids))
+        results = {}
+        async for response in self.stream(
+            item_ids,
+            prediction_days,
+            engine=engine,
+            hierarchy=hierarchy,
+            reconcile=reconcile
+        ):
+            results[response.item_id] = response
+            if on_progress is not None:
+                await on_progress(len(results), total)
+
+        return [results[item_id] for item_id in item_ids]
+
+    async def stream(
+        self,
+        item_ids: List[int],
+        prediction_days: int,
+        engine: str = "prophet",
+        hierarchy: Optional[str] = None,
+        reconcile: bool = False
+    ) -> AsyncIterator[PredictionResponseSchema]:
+        """
+        Отдает прогнозы по мере готовности: сначала найденные в кэше, затем рассчитанные
+
+        Каждый товар отдается один раз, даже если он повторяется в запросе.
+        С hierarchy модели обучаются на рядах групп (category или supplier),
+        а прогнозы товаров получаются делением прогноза группы.
+        """
+        config = ENGINE_CONFIGS[engine]
+        item_ids = list(dict.fromkeys(item_ids))
+        FORECAST_REQUEST_ITEMS.labels(engine=engine).observe(len(item_ids))
+
+        # Прогноз товара в иерархическом режиме зависит от всех товаров группы,
+        # а версия в кэше отслеживает только сам товар, поэтому такие прогнозы
+        # не кэшируются; модели групп при этом переиспользуются через реестр
+        if hierarchy is not None:
+            async for response in self._predict_hierarchical(
+                item_ids, prediction_days, engine, hierarchy, reconcile
+            ):
+                FORECAST_ITEMS.labels(engine=engine, source="computed", status=response.status).inc()
+                yield response
+            return
+
+        # Версии данных читаем до загрузки ряда: если транзакция придет во время
+        # расчета, прогноз сохранится под старой версией и не будет отдан.
+        # Версию меняет запись в основную БД, поэтому и ряды с названиями товаров
+        # читаем оттуда: реплика может еще не получить записанное
+        self.transaction_service.use_primary()
+        self.item_service.use_primary()
+        versions = {item_id: self.cache.data_version(item_id) for item_id in item_ids}
+        missing = []
+        for item_id in item_ids:
+            response = self.cache.get(item_id, versions[item_id], prediction_days, config)
+            if response is None:
+                missing.append(item_id)
+            else:
+                FORECAST_ITEMS.labels(engine=engine, source="cache", status=response.status).inc()
+                yield response
+
+        if not missing:
+            return
+
+        async for response in self._compute(missing, prediction_days, engine):
+            if response.status == "success":
+                self.cache.set(response.item_id, versions[response.item_id], prediction_days, config, response)
+            FORECAST_ITEMS.labels(engine=engine, source="computed", status=response.status).inc()
+            yield response
+
+    async def _compute(
+        self,
+        item_ids: List[int],
+        prediction_days: int,
+        engine: str
+    ) -> AsyncIterator[PredictionResponseSchema]:
+        # Получаем суммы по дням только для запрошенных товаров, агрегированные в БД
+        # Если данных нет, каждый товар получит свою ошибку, а не весь запрос:
+        # часть товаров могла быть отдана из кэша
+        with observe_stage(engine, "fetch"):
+            usage_rows = await self.transaction_service.get_daily_usage(item_ids)
+
+            # Получаем запрошенные товары одним запросом
+            items = {item.item_id: item for item in await self.item_service.get_items(item_ids)}
+
+        # Подготавливаем данные из БД
+        with observe_stage(engine, "prepare"):
+            usage = prepare_data_from_db(usage_rows)
+
+        if engine == "fast":
+            for response in await self._predict_fast(usage, item_ids, items, prediction_days):
+                yield response
+            return
+
+        # Товары, которых нет в БД, сразу помечаем ошибкой, остальные
+        # отправляем на обучение в пул процессов
+        tasks = []
+        for item_id in item_ids:
+            item = items.get(item_id)
+            if not item:
+                yield PredictionResponseSchema(
+                    item_id=item_id,
+                    item_name="Unknown",
+                    predictions=[],
+                    status="error",
+                    error=f"Товар с ID {item_id} не найден"
+                )
+                continue
+
+            # Получаем данные для конкретного товара: строка матрицы берется за O(1)
+            item_data = usage.series(item_id)
+            tasks.append((item_data, item_id, item.item_name, prediction_days, self.registry))
+
+        # Время обучения и прогноза измеряется в процессе пула и приходит вместе с ответом
+        async for _, (response, timings) in self.executor.as_completed(forecast_item, tasks):
+            observe_stages(engine, timings)
+            yield response
+
+    async def _predict_fast(
+        self,
+        usage: DailyUsageMatrix,
+        item_ids: List[int],
+        items: dict,
+        prediction_days: int
+    ) -> List[PredictionResponseSchema]:
+        # Все товары решаются одной матричной операцией, поэтому пул процессов не нужен,
+        # достаточно вынести расчет из event loop
+        names = {item_id: items[item_id].item_name for item_id in item_ids if item_id in items}
+        forecasts = {}
+
+        if not usage.empty:
+            holidays = get_holidays(
+                usage.dates[0],
+                usage.dates[-1] + np.timedelta64(prediction_days, 'D')
+            )
+            # Быстрый движок обучает и прогнозирует одним решением, поэтому стадия одна
+            with observe_stage("fast", "fit"):
+                computed = await asyncio.to_thread(
+                    forecast_items_fast, usage, names, prediction_days, holidays
+                )
+            for response in computed:
+                forecasts[response.item_id] = response
+
+        responses = [
+            forecasts.get(item_id) or PredictionResponseSchema(
+                item_id=item_id,
+                item_name=names.get(item_id, "Unknown"),
+                predictions=[],
+                status="error",
+                error=(
+                    "Недостаточно данных для прогнозирования" if item_id in names
+                    else f"Товар с ID {item_id} не найден"
+                )
+            )
+            for item_id in item_ids
+        ]
+
+        return responses
+
+    async def _predict_hierarchical(
+        self,
+        item_ids: List[int],
+        prediction_days: int,
+        engine: str,
+        hierarchy: str,
+        reconcile: bool
+    ) -> AsyncIterator[PredictionResponseSchema]:
+        items = {item.item_id: item for item in await self.item_service.get_items(item_ids)}
+
+        # Раскладываем запрошенные товары по группам
+        requested = {}
+        for item_id in item_ids:
+            item = items.get(item_id)
+            if not item:
+                yield PredictionResponseSchema(
+                    item_id=item_id,
+                    item_name="Unknown",
+                    predictions=[],
+                    status="error",
+                    error=f"Товар с ID {item_id} не найден"
+                )
+                continue
+
+            requested.setdefault(getattr(item, hierarchy), []).append(item_id)
+
+        if not requested:
+            return
+
+        groups = list(requested)
+        names = {item_id: item.item_name for item_id, item in items.items()}
+
+        if reconcile:
+            # Для согласования нужны прогнозы всех товаров группы, поэтому
+            # загружаем их ряды и складываем группы из них же
+            item_groups = {
+                item.item_id: getattr(item, hierarchy)
+                for item in await self.item_service.get_items_by(hierarchy, groups)
+            }
+            usage = prepare_data_from_db(await self.transaction_service.get_daily_usage(list(item_groups)))
+            group_usage = sum_by_group(usage, item_groups, groups)
+        else:
+            # Ряды групп суммируются в БД, ряды нужны только запрошенным товарам для долей
+            codes = {group: code for code, group in enumerate(groups)}
+            usage = prepare_data_from_db(await self.transaction_service.get_daily_usage(list(items)))
+            group_rows = await self.transaction_service.get_daily_group_usage(hierarchy, groups)
+            group_usage = prepare_data_from_db(
+                (codes[group], day, quantity) for group, day, quantity in group_rows
+            )
+
+        holidays = None
+        if len(group_usage.dates) >= 2:
+            holidays = get_holidays(
+                group_usage.dates[0],
+                group_usage.dates[-1] + np.timedelta64(prediction_days, 'D')
+            )
+
+        async for code, forecast, error in self._forecast_groups(
+            group_usage, groups, prediction_days, engine, hierarchy, holidays
+        ):
+            group = groups[code]
+            with_data = [item_id for item_id in requested[group] if item_id in usage]
+
+            for item_id in requested[group]:
+                if error or item_id not in usage:
+                    yield PredictionResponseSchema(
+                        item_id=item_id,
+                        item_name=names[item_id],
+                        predictions=[],
+                        status="error",
+                        error=error or "Недостаточно данных для прогнозирования"
+                    )
+
+            if error or not with_data:
+                continue
+
+            if reconcile:
+                # Доли на каждый день горизонта берутся из быстрых прогнозов всех товаров группы
+                members = [
+                    item_id for item_id, item_group in item_groups.items()
+                    if item_group == group and item_id in usage
+                ]
+                # Товары обучаются на диапазоне дат группы, чтобы их прогнозы
+                # начинались с того же дня, что и прогноз группы
+                span = group_usage.span(code)
+                bottom_up = await asyncio.to_thread(
+                    fit_predict, usage.take(members)[:, span], usage.dates[span], prediction_days, holidays
+                )
+                proportions = forecast_proportions(
+                    bottom_up['yhat'],
+                    recent_shares(usage, members, group_usage, code)
+                )
+                positions = {item_id: row for row, item_id in enumerate(members)}
+                weights = proportions[[positions[item_id] for item_id in with_data]]
+            else:
+                weights = recent_shares(usage, with_data, group_usage, code)[:, None]
+
+            for response in to_responses(with_data, names, disaggregate(forecast, weights)):
+                yield response
+
+    async def _forecast_groups(
+        self,
+        group_usage: DailyUsageMatrix,
+        groups: List[str],
+        prediction_days: int,
+        engine: str,
+        hierarchy: str,
+        holidays
+    ) -> AsyncIterator[tuple]:
+        # Отдает (номер группы, прогноз группы, ошибка) по мере готовности
+        with_data = [code for code in range(len(groups)) if code in group_usage]
+        for code in range(len(groups)):
+            if code not in group_usage or holidays is None:
+                yield code, None, "Недостаточно данных для прогнозирования"
+
+        if holidays is None or not with_data:
+            return
+
+        if engine == "fast":
+            # Как и у товаров, ряд группы идет от ее первого до последнего дня,
+            # поэтому одним решением обучаются группы с одинаковым диапазоном дат
+            spans: Dict[tuple, List[int]] = {}
+            for code in with_data:
+                span = group_usage.span(code)
+                spans.setdefault((span.start, span.stop), []).append(code)
+
+            for (start, stop), codes in spans.items():
+                if stop - start < 2:
+                    for code in codes:
+                        yield code, None, "Недостаточно данных для прогнозирования"
+                    continue
+
+                with observe_stage(engine, "fit"):
+                    forecast = await asyncio.to_thread(
+                        fit_predict,
+                        group_usage.take(codes)[:, start:stop],
+                        group_usage.dates[start:stop],
+                        prediction_days,
+                        holidays
+                    )
+                for row, code in enumerate(codes):
+                    yield code, {
+                        'ds': forecast['ds'],
+                        **{key: forecast[key][row] for key in ('yhat', 'yhat_lower', 'yhat_upper')}
+                    }, None
+            return
+
+        # Модель группы хранится в реестре под ключом уровня и названия группы
+        tasks = [
+            (group_usage.series(code), f"{hierarchy}:{groups[code]}", prediction_days, self.registry)
+            for code in with_data
+        ]
+        async for index, (forecast, error, timings) in self.executor.as_completed(forecast_group, tasks):
+            observe_stages(engine, timings)
+            yield with_data[index], forecast, error
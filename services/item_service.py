@@ -1,27 +1,169 @@
-from typing import List
+from bisect import bisect_right
+from typing import List, Optional, Tuple
 
 from fastapi import Depends
 
 from models.item_model import ItemModel
 from repositories.item_repository import ItemRepository
+from utils.item_cache import MISS, ItemCache, ItemSnapshot, get_item_cache
+from utils.forecast_cache import ForecastCache, get_forecast_cache
+from utils.pagination import Page, encode_cursor, decode_cursor
 
 
 class ItemService:
     
-    def __init__(self, repository: ItemRepository = Depends(ItemRepository)) -> None:
+    def __init__(
+        self,
+        repository: ItemRepository = Depends(ItemRepository),
+        cache: ItemCache = Depends(get_item_cache),
+        forecast_cache: ForecastCache = Depends(get_forecast_cache)
+    ) -> None:
         self.repository = repository
+        self.cache = cache
+        self.forecast_cache = forecast_cache
 
-    def create_item(self, item: ItemModel) -> ItemModel:
-        return self.repository.create(item)
+    def _use_cache(self) -> bool:
+        # Сессия, привязанная к основному серверу, ждет свежих данных, а кэш может
+        # отставать на ttl, поэтому такие чтения идут мимо него
+        return not self.repository.primary_only()
 
-    def delete_item(self, id: int) -> None:
-        self.repository.delete(id)
+    async def _catalogue(self) -> Optional[Tuple[ItemSnapshot, ...]]:
+        # Весь справочник из кэша; None, если он не помещается в кэш или кэш не используется
+        if not self._use_cache():
+            return None
 
-    def get_item(self, id: int) -> ItemModel:
-        return self.repository.get(id)
+        items = self.cache.catalogue()
 
-    def list_items(self, limit: int = None, start: int = None) -> List[ItemModel]:
-        return self.repository.list(limit=limit, start=start)
+        if items is MISS:
+            # Кэш заполняем только с основного сервера: данные реплики могут отставать
+            generation = self.cache.generation()
+            with self.repository.on_primary():
+                models = await self.repository.list(limit=self.cache.max_entries + 1)
+            items = tuple(ItemSnapshot.from_model(model) for model in models)
+            self.cache.set_catalogue(items, generation)
+            if len(items) > self.cache.max_entries:
+                return None
 
-    def update_item(self, id: int, item: ItemModel) -> ItemModel:
-        return self.repository.update(id, item)
+        return items
+
+    async def create_item(self, item: ItemModel) -> ItemModel:
+        created = await self.repository.create(item)
+        self.cache.invalidate(created.item_id)
+        return created
+
+    async def upsert_items(self, items: List[ItemModel]) -> Tuple[int, int]:
+        """
+        Создает новые и перезаписывает существующие товары пакетом
+
+        Returns:
+            Число созданных и число обновленных товаров
+        """
+        result = await self.repository.upsert_many(items)
+        self.cache.invalidate()
+
+        # В прогнозах хранится название товара, поэтому они тоже устаревают;
+        # у новых товаров без item_id прогнозов еще нет
+        for item in items:
+            if item.item_id is not None:
+                self.forecast_cache.bump(item.item_id)
+
+        return result
+
+    async def delete_item(self, id: int) -> Optional[ItemModel]:
+        deleted = await self.repository.delete(id)
+        self.cache.invalidate(id)
+
+        if deleted:
+            self.forecast_cache.bump(id)
+
+        return deleted
+
+    def use_primary(self) -> None:
+        # Дальнейшие чтения сервиса идут в основную БД, а не в реплику
+        self.repository.use_primary()
+
+    async def get_item(self, id: int) -> Optional[ItemSnapshot]:
+        if not self._use_cache():
+            model = await self.repository.get(id)
+            return ItemSnapshot.from_model(model) if model else None
+
+        item = self.cache.get(id)
+
+        if item is MISS:
+            generation = self.cache.generation()
+            with self.repository.on_primary():
+                model = await self.repository.get(id)
+            item = ItemSnapshot.from_model(model) if model else None
+            if item:
+                self.cache.set(item, generation)
+
+        return item
+
+    async def get_items(self, ids: List[int]) -> List[ItemSnapshot]:
+        if not self._use_cache():
+            found = {model.item_id: ItemSnapshot.from_model(model) for model in await self.repository.get_many(ids)}
+            return [found[id] for id in ids if id in found]
+
+        cached = {id: self.cache.get(id) for id in ids}
+        missing = [id for id, item in cached.items() if item is MISS]
+
+        if missing:
+            generation = self.cache.generation()
+            with self.repository.on_primary():
+                models = await self.repository.get_many(missing)
+            for model in models:
+                cached[model.item_id] = ItemSnapshot.from_model(model)
+                self.cache.set(cached[model.item_id], generation)
+
+        return [item for item in cached.values() if item is not None and item is not MISS]
+
+    async def get_items_by(self, attribute: str, values: List[str]) -> List[ItemSnapshot]:
+        catalogue = await self._catalogue()
+
+        if catalogue is None:
+            return [ItemSnapshot.from_model(model) for model in await self.repository.list_by(attribute, values)]
+
+        values = set(values)
+        return [item for item in catalogue if getattr(item, attribute) in values]
+
+    async def list_items(self, limit: int = None, start: int = None, cursor: str = None) -> Page[ItemSnapshot]:
+        """
+        Страница товаров по возрастанию item_id
+
+        Raises:
+            ValueError: если курсор некорректен
+        """
+        after = None
+        if cursor:
+            after, = decode_cursor(cursor, 1)
+            if not isinstance(after, int):
+                raise ValueError("Некорректный курсор")
+
+        # Лишняя строка показывает, есть ли следующая страница
+        fetch = limit + 1 if limit is not None else None
+        catalogue = await self._catalogue()
+
+        if catalogue is None:
+            models = await self.repository.list(limit=fetch, start=start, after=after)
+            items = [ItemSnapshot.from_model(model) for model in models]
+        else:
+            position = bisect_right(catalogue, after, key=lambda item: item.item_id) if after is not None else 0
+            position += start or 0
+            items = list(catalogue[position:position + fetch if fetch is not None else None])
+
+        next_cursor = None
+        if limit and len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(items[-1].item_id)
+
+        return Page(items, next_cursor)
+
+    async def update_item(self, id: int, item: ItemModel) -> Optional[ItemModel]:
+        updated = await self.repository.update(id, item)
+        self.cache.invalidate(id)
+
+        # В прогнозах хранится название товара, поэтому они тоже устаревают
+        if updated:
+            self.forecast_cache.bump(id)
+
+        return updated
@@ -0,0 +1,23 @@
+from typing import List
+
+from fastapi import Depends
+
+from models.stock_balance_model import StockBalanceModel
+from repositories.stock_balance_repository import StockBalanceRepository
+
+
+class StockService:
+
+    def __init__(self, repository: StockBalanceRepository = Depends(StockBalanceRepository)) -> None:
+        self.repository = repository
+
+    async def get_stock(self, item_id: int) -> StockBalanceModel:
+        return await self.repository.get(item_id)
+
+    async def list_stock(
+        self,
+        item_ids: List[int] = None,
+        limit: int = None,
+        start: int = None
+    ) -> List[StockBalanceModel]:
+        return await self.repository.list(item_ids=item_ids, limit=limit, start=start)
@@ -1,40 +1,183 @@
-from typing import List
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+from datetime import datetime
 
 from fastapi import Depends
 
 from models.transaction_model import TransactionModel
 from repositories.transaction_repository import TransactionRepository
+from utils.forecast_cache import ForecastCache, get_forecast_cache
+from utils.pagination import Page, encode_cursor, decode_cursor
 
 
 class TransactionService:
     
-    def __init__(self, repository: TransactionRepository = Depends(TransactionRepository)) -> None:
+    def __init__(
+        self,
+        repository: TransactionRepository = Depends(TransactionRepository),
+        forecast_cache: ForecastCache = Depends(get_forecast_cache)
+    ) -> None:
         self.repository = repository
+        self.forecast_cache = forecast_cache
+
+    async def create_transaction(self, transaction: TransactionModel) -> TransactionModel:
+        created = await self.repository.create(transaction)
+        self.forecast_cache.bump(created.item_id)
+        return created
+
+    async def create_transactions(self, transactions: List[TransactionModel]) -> List[TransactionModel]:
+        """
+        Создает пакет транзакций одной вставкой
+
+        Returns:
+            Созданные транзакции; уже существующие transaction_id пропускаются
+        """
+        created = await self.repository.create_many(transactions)
+
+        for item_id in {transaction.item_id for transaction in created}:
+            self.forecast_cache.bump(item_id)
+
+        return created
+
+    async def delete_transaction(self, id: str) -> Optional[TransactionModel]:
+        deleted = await self.repository.delete(id)
 
-    def create_transaction(self, transaction: TransactionModel) -> TransactionModel:
-        return self.repository.create(transaction)
+        if deleted:
+            self.forecast_cache.bump(deleted.item_id)
 
-    def delete_transaction(self, id: str) -> None:
-        self.repository.delete(id)
+        return deleted
 
-    def get_transaction(self, id: str) -> TransactionModel:
-        return self.repository.get(id)
+    async def get_transaction(self, id: str) -> TransactionModel:
+        return await self.repository.get(id)
 
-    def list_transactions(
+    @staticmethod
+    def _after(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+        if not cursor:
+            return None
+
+        date, transaction_id = decode_cursor(cursor, 2)
+        if not isinstance(date, str) or not isinstance(transaction_id, str):
+            raise ValueError("Некорректный курсор")
+        return datetime.fromisoformat(date), transaction_id
+
+    @staticmethod
+    def _cut(rows: list, limit: Optional[int]) -> Tuple[list, Optional[str]]:
+        # Лишняя строка показывает, есть ли следующая страница
+        if not limit or len(rows) <= limit:
+            return rows, None
+
+        rows = rows[:limit]
+        date, transaction_id = rows[-1].date, rows[-1].transaction_id
+        return rows, encode_cursor(date.isoformat(), transaction_id)
+
+    async def list_transactions(
         self,
         limit: int = None,
         start: int = None,
         item_id: str = None,
         start_date: str = None,
-        end_date: str = None
-    ) -> List[TransactionModel]:
-        return self.repository.list(
-            limit=limit,
+        end_date: str = None,
+        cursor: str = None
+    ) -> Page[TransactionModel]:
+        """
+        Страница транзакций по возрастанию (date, transaction_id)
+
+        В versions лежат пары (transaction_id, версия строки) в порядке страницы.
+
+        Raises:
+            ValueError: если курсор некорректен
+        """
+        rows = await self.repository.list_with_versions(
+            limit=limit + 1 if limit is not None else None,
+            start=start,
+            item_id=item_id,
+            start_date=start_date,
+            end_date=end_date,
+            after=self._after(cursor)
+        )
+
+        transactions = [row.TransactionModel for row in rows]
+        transactions, next_cursor = self._cut(transactions, limit)
+        versions = [(row.TransactionModel.transaction_id, row.version) for row in rows[:len(transactions)]]
+
+        return Page(transactions, next_cursor, versions)
+
+    async def list_transaction_versions(
+        self,
+        limit: int = None,
+        start: int = None,
+        item_id: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        cursor: str = None
+    ) -> Page[Tuple[str, int]]:
+        """
+        Пары (transaction_id, версия строки) той же страницы, что и list_transactions
+
+        Нужны для сверки ETag без чтения самих транзакций.
+
+        Raises:
+            ValueError: если курсор некорректен
+        """
+        rows = await self.repository.list_versions(
+            limit=limit + 1 if limit is not None else None,
             start=start,
             item_id=item_id,
             start_date=start_date,
+            end_date=end_date,
+            after=self._after(cursor)
+        )
+
+        rows, next_cursor = self._cut(rows, limit)
+        versions = [(row.transaction_id, row.version) for row in rows]
+        return Page(versions, next_cursor, versions)
+
+    def export_transactions(
+        self,
+        chunk_size: int,
+        item_id: str = None,
+        start_date: str = None,
+        end_date: str = None
+    ) -> AsyncIterator[Sequence[tuple]]:
+        """
+        Транзакции по возрастанию (date, transaction_id) частями по chunk_size строк
+
+        Строки содержат колонки таблицы transactions в ее порядке.
+        """
+        return self.repository.stream(
+            chunk_size,
+            item_id=item_id,
+            start_date=start_date,
             end_date=end_date
         )
 
-    def update_transaction(self, id: str, transaction: TransactionModel) -> TransactionModel:
-        return self.repository.update(id, transaction)
+    def use_primary(self) -> None:
+        # Дальнейшие чтения сервиса идут в основную БД, а не в реплику
+        self.repository.use_primary()
+
+    async def get_daily_usage(
+        self,
+        item_ids: List[int],
+        start_date: str = None,
+        end_date: str = None
+    ) -> List[tuple]:
+        return await self.repository.daily_usage(
+            item_ids,
+            start_date=start_date,
+            end_date=end_date
+        )
+
+    async def get_daily_group_usage(self, attribute: str, groups: List[str]) -> List[tuple]:
+        return await self.repository.daily_group_usage(attribute, groups)
+
+    async def update_transaction(self, id: str, transaction: TransactionModel) -> Optional[TransactionModel]:
+        result = await self.repository.update_with_previous(id, transaction)
+
+        if not result:
+            return None
+
+        # Транзакция могла переехать на другой товар: сбрасываем прогнозы обоих
+        previous, updated = result
+        for item_id in {previous.item_id, updated.item_id}:
+            self.forecast_cache.bump(item_id)
+
+        return updated
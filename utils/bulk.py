@@ -0,0 +1,49 @@
+from typing import Any, Callable, Dict, List, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from schemas.pydantic.bulk_schema import BulkErrorSchema
+
+S = TypeVar("S", bound=BaseModel)
+
+
+def format_validation_error(error: ValidationError) -> str:
+    # Одна строка на строку пакета: "поле: сообщение; поле: сообщение"
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def validate_rows(
+    rows: List[Dict[str, Any]],
+    schema: Type[S],
+    key: Callable[[S], Any]
+) -> Tuple[List[Tuple[int, S]], List[BulkErrorSchema]]:
+    """
+    Проверяет строки пакета по отдельности
+
+    Некорректная строка не отменяет остальные, а попадает в список ошибок
+    со своим номером. Повтор ключа внутри пакета тоже считается ошибкой:
+    одна вставка не может записать строку дважды.
+
+    Returns:
+        Пары (номер строки, схема) для корректных строк и ошибки остальных
+    """
+    valid, errors, seen = [], [], set()
+
+    for index, row in enumerate(rows):
+        try:
+            parsed = schema.model_validate(row)
+        except ValidationError as e:
+            errors.append(BulkErrorSchema(index=index, error=format_validation_error(e)))
+            continue
+
+        if key(parsed) in seen:
+            errors.append(BulkErrorSchema(index=index, error=f"Повторяющийся ключ {key(parsed)} в пакете"))
+            continue
+
+        seen.add(key(parsed))
+        valid.append((index, parsed))
+
+    return valid, errors
@@ -0,0 +1,34 @@
+import hashlib
+
+from typing import Iterable, Optional
+
+
+def make_etag(rows: Iterable[tuple]) -> str:
+    """
+    Сильный ETag по строкам, которые уходят в ответ
+
+    Строки передаются кортежами: значениями колонок или парами (ключ, версия
+    строки). Считается по тем же данным, что и тело ответа, поэтому не может
+    описывать другие строки, откуда бы они ни были прочитаны: из кэша, реплики
+    или основной БД. Хэшируется repr кортежа, без сериализации в JSON.
+    """
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(repr(tuple(row)).encode())
+        digest.update(b"\n")
+
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match
+
+    Для If-None-Match используется слабое сравнение: префикс W/ не учитывается.
+    "*" не поддерживается: он нужен условным записям, а не GET.
+    """
+    if not if_none_match:
+        return False
+
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
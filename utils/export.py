@@ -0,0 +1,134 @@
+import io
+import csv
+import json
+
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from sqlalchemy import Column, DateTime, Float, Integer, String
+
+# Части строк из курсора; каждая часть кодируется и отправляется отдельно
+Chunks = AsyncIterator[Sequence[tuple]]
+
+
+class ExportFormat(NamedTuple):
+    media_type: str
+    extension: str
+    encode: Callable[[Chunks, pa.Schema], AsyncIterator[bytes]]
+
+
+class _DrainSink:
+    """
+    Файловый объект для писателей pyarrow, из которого записанное забирается по частям
+
+    Позиция считается от начала потока: Parquet записывает смещения
+    групп строк в конце файла.
+    """
+
+    def __init__(self) -> None:
+        self.buffers: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.buffers.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.buffers)
+        self.buffers.clear()
+        return data
+
+
+# Типы колонок моделей в типах Arrow
+ARROW_TYPES = {
+    String: pa.string(),
+    DateTime: pa.timestamp("us"),
+    Integer: pa.int64(),
+    Float: pa.float64(),
+}
+
+
+def arrow_schema(columns: Sequence[Column]) -> pa.Schema:
+    return pa.schema([
+        pa.field(column.name, ARROW_TYPES[type(column.type)], nullable=column.nullable)
+        for column in columns
+    ])
+
+
+def _record_batch(rows: Sequence[tuple], schema: pa.Schema) -> pa.RecordBatch:
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+async def encode_csv(chunks: Chunks, schema: pa.Schema) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(schema.names)
+
+    async for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Заголовок пустой выгрузки
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _json_default(value):
+    # Даты в том же виде, что и в JSON-ответах API
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+async def encode_ndjson(chunks: Chunks, schema: pa.Schema) -> AsyncIterator[bytes]:
+    async for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(schema.names, row)), default=_json_default, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode()
+
+
+async def encode_arrow(chunks: Chunks, schema: pa.Schema) -> AsyncIterator[bytes]:
+    # Arrow IPC stream: схема, затем по одному record batch на часть
+    sink = _DrainSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        async for rows in chunks:
+            writer.write_batch(_record_batch(rows, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+async def encode_parquet(chunks: Chunks, schema: pa.Schema) -> AsyncIterator[bytes]:
+    # Каждая часть становится группой строк; метаданные файла пишутся в конце
+    sink = _DrainSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        async for rows in chunks:
+            writer.write_batch(_record_batch(rows, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    "csv": ExportFormat("text/csv", "csv", encode_csv),
+    "ndjson": ExportFormat("application/x-ndjson", "ndjson", encode_ndjson),
+    "arrow": ExportFormat("application/vnd.apache.arrow.stream", "arrows", encode_arrow),
+    "parquet": ExportFormat("application/vnd.apache.parquet", "parquet", encode_parquet),
+}
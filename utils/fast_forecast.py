@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List
+
+from utils.model_registry import config_hash
+from utils.holiday_calendar import HOLIDAYS
+from utils.usage_matrix import DailyUsageMatrix
+from schemas.pydantic.prediction_schema import PredictionResponseSchema, PredictionDataSchema
+
+# Порядок рядов Фурье для недельной и годовой сезонности
+WEEKLY_ORDER = 3
+YEARLY_ORDER = 10
+
+# Регуляризация, чтобы система оставалась разрешимой на коротких рядах
+RIDGE = 1e-3
+
+# Квантиль для интервала 80%, как interval_width у Prophet по умолчанию
+INTERVAL_Z = 1.2816
+
+# Ключ конфигурации движка для кэша прогнозов
+FAST_CONFIG = config_hash({
+    'weekly_order': WEEKLY_ORDER,
+    'yearly_order': YEARLY_ORDER,
+    'ridge': RIDGE,
+    'interval_z': INTERVAL_Z,
+    'holidays': HOLIDAYS
+})
+
+
+def design_matrix(
+    dates: np.ndarray,
+    origin: np.datetime64,
+    holidays: pd.DataFrame
+) -> np.ndarray:
+    """
+    Строит матрицу признаков: линейный тренд, ряды Фурье и праздничные флаги
+
+    Args:
+        dates: массив дат datetime64[D]
+        origin: дата начала обучающего ряда, от нее отсчитывается тренд
+        holidays: праздники в формате Prophet (holiday, ds, lower_window, upper_window)
+    """
+    days = (dates - origin).astype('float64')
+    epoch_days = dates.astype('int64').astype('float64')
+
+    columns = [np.ones_like(days), days / 365.25]
+
+    for period, order in ((7.0, WEEKLY_ORDER), (365.25, YEARLY_ORDER)):
+        for k in range(1, order + 1):
+            angle = 2 * np.pi * k * epoch_days / period
+            columns.append(np.sin(angle))
+            columns.append(np.cos(angle))
+
+    # Один флаг на праздник с учетом окна до и после даты
+    for _, group in holidays.groupby('holiday', sort=True):
+        holiday_dates = [
+            np.datetime64(ds, 'D') + np.arange(lower, upper + 1)
+            for ds, lower, upper in zip(group['ds'], group['lower_window'], group['upper_window'])
+        ]
+        columns.append(np.isin(dates, np.concatenate(holiday_dates)).astype('float64'))
+
+    return np.column_stack(columns)
+
+
+def fit_predict(
+    usage: np.ndarray,
+    dates: np.ndarray,
+    periods: int,
+    holidays: pd.DataFrame
+) -> Dict[str, np.ndarray]:
+    """
+    Обучает модели сразу для всех товаров одним решением МНК
+
+    Args:
+        usage: матрица товары x дни
+        dates: даты столбцов usage, datetime64[D], подряд без пропусков
+        periods: горизонт прогноза в днях
+        holidays: праздники в формате Prophet
+
+    Returns:
+        Словарь с датами прогноза (ds) и матрицами yhat, yhat_lower, yhat_upper (товары x periods)
+    """
+    origin = dates[0]
+    future = dates[-1] + np.arange(1, periods + 1)
+
+    train = design_matrix(dates, origin, holidays)
+    test = design_matrix(future, origin, holidays)
+
+    # Нормальные уравнения с одной матрицей для всех товаров: (X'X + λI) B = X'Y
+    targets = usage.T.astype('float64')
+    gram = train.T @ train + RIDGE * np.eye(train.shape[1])
+    coefficients = np.linalg.solve(gram, train.T @ targets)
+
+    residuals = targets - train @ coefficients
+    dof = max(len(dates) - train.shape[1], 1)
+    sigma = np.sqrt((residuals ** 2).sum(axis=0) / dof)
+
+    yhat = (test @ coefficients).T
+    margin = INTERVAL_Z * sigma[:, None]
+
+    return {
+        'ds': future,
+        'yhat': yhat,
+        'yhat_lower': yhat - margin,
+        'yhat_upper': yhat + margin
+    }
+
+
+def forecast_items_fast(
+    usage: DailyUsageMatrix,
+    items: Dict[int, str],
+    periods: int,
+    holidays: pd.DataFrame
+) -> List[PredictionResponseSchema]:
+    """
+    Строит прогнозы быстрым движком для всех переданных товаров
+
+    Args:
+        usage: матрица суточного расхода товары x дни
+        items: названия товаров по их ID
+        periods: горизонт прогноза в днях
+        holidays: праздники в формате Prophet
+    """
+    # Ряд каждого товара идет от его первого до последнего дня, поэтому одним
+    # решением обучаются товары с одинаковым диапазоном дат
+    spans: Dict[tuple, List[int]] = {}
+    for item_id in items:
+        if item_id in usage:
+            span = usage.span(item_id)
+            spans.setdefault((span.start, span.stop), []).append(item_id)
+
+    responses = {}
+    for (start, stop), item_ids in spans.items():
+        if stop - start < 2:
+            continue
+
+        forecast = fit_predict(usage.take(item_ids)[:, start:stop], usage.dates[start:stop], periods, holidays)
+        future = pd.to_datetime(forecast['ds'])
+
+        for row, item_id in enumerate(item_ids):
+            responses[item_id] = PredictionResponseSchema(
+                item_id=item_id,
+                item_name=items[item_id],
+                predictions=[
+                    PredictionDataSchema(
+                        date=date,
+                        predicted_quantity=max(0, float(yhat)),
+                        lower_bound=max(0, float(lower)),
+                        upper_bound=max(0, float(upper))
+                    )
+                    for date, yhat, lower, upper in zip(
+                        future,
+                        forecast['yhat'][row],
+                        forecast['yhat_lower'][row],
+                        forecast['yhat_upper'][row]
+                    )
+                ],
+                status="success"
+            )
+
+    return [
+        responses.get(item_id) or PredictionResponseSchema(
+            item_id=item_id,
+            item_name=item_name,
+            predictions=[],
+            status="error",
+            error="Недостаточно данных для прогнозирования"
+        )
+        for item_id, item_name in items.items()
+    ]
@@ -0,0 +1,126 @@
+import os
+import uuid
+import shutil
+import hashlib
+import tempfile
+import threading
+
+from typing import Optional
+from functools import lru_cache
+from collections import OrderedDict
+
+from configs.enviroment import get_environment_variables
+from schemas.pydantic.prediction_schema import PredictionResponseSchema
+
+
+class ForecastCache:
+    """
+    Двухуровневый кэш прогнозов: LRU в памяти процесса и общий каталог на диске
+
+    Ключ включает версию данных товара, которую TransactionService меняет при каждой
+    записи транзакции, поэтому после новых движений старые прогнозы не отдаются.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024) -> None:
+        self.results_path = os.path.join(path, "results")
+        self.versions_path = os.path.join(path, "versions")
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.results_path, exist_ok=True)
+        os.makedirs(self.versions_path, exist_ok=True)
+
+    @staticmethod
+    def _write_atomic(path: str, data: str) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _item_path(self, item_id) -> str:
+        return os.path.join(self.results_path, str(item_id))
+
+    def _key(self, item_id, version: str, periods: int, config: str) -> str:
+        payload = f"{item_id}:{version}:{periods}:{config}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _read_version(self, name: str) -> str:
+        try:
+            with open(os.path.join(self.versions_path, name), encoding="utf-8") as file:
+                return file.read()
+        except OSError:
+            return "0"
+
+    def data_version(self, item_id) -> str:
+        # Общая эпоха меняется при clear(), версия товара - при записи его транзакций
+        return f"{self._read_version('_epoch')}:{self._read_version(str(item_id))}"
+
+    def bump(self, item_id) -> None:
+        # Новая случайная версия вместо счетчика: параллельным воркерам не нужно
+        # согласовывать инкремент, любое новое значение инвалидирует старые записи
+        self._write_atomic(os.path.join(self.versions_path, str(item_id)), uuid.uuid4().hex)
+        shutil.rmtree(self._item_path(item_id), ignore_errors=True)
+
+    def get(
+        self,
+        item_id,
+        version: str,
+        periods: int,
+        config: str
+    ) -> Optional[PredictionResponseSchema]:
+        key = self._key(item_id, version, periods, config)
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        try:
+            with open(os.path.join(self._item_path(item_id), f"{key}.json"), encoding="utf-8") as file:
+                response = PredictionResponseSchema.model_validate_json(file.read())
+        except (OSError, ValueError):
+            return None
+
+        self._remember(key, response)
+        return response
+
+    def set(
+        self,
+        item_id,
+        version: str,
+        periods: int,
+        config: str,
+        response: PredictionResponseSchema
+    ) -> None:
+        key = self._key(item_id, version, periods, config)
+        self._write_atomic(os.path.join(self._item_path(item_id), f"{key}.json"), response.model_dump_json())
+        self._remember(key, response)
+
+    def clear(self) -> None:
+        # Смена эпохи инвалидирует записи в памяти всех процессов, а не только текущего
+        self._write_atomic(os.path.join(self.versions_path, "_epoch"), uuid.uuid4().hex)
+        with self._lock:
+            self._memory.clear()
+        shutil.rmtree(self.results_path, ignore_errors=True)
+        os.makedirs(self.results_path, exist_ok=True)
+
+    def _remember(self, key: str, response: PredictionResponseSchema) -> None:
+        with self._lock:
+            self._memory[key] = response
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+
+@lru_cache
+def get_forecast_cache() -> ForecastCache:
+    env = get_environment_variables()
+    return ForecastCache(env.FORECAST_CACHE_PATH, max_entries=env.FORECAST_CACHE_SIZE)
@@ -0,0 +1,82 @@
+import os
+import asyncio
+import multiprocessing
+
+from typing import Any, AsyncIterator, Callable, Iterable, List, Tuple
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+from configs.enviroment import get_environment_variables
+from utils.metrics import configure_logging
+
+# Переменные окружения, которыми нативные библиотеки (BLAS, OpenMP, Stan)
+# определяют число своих потоков
+THREAD_LIMIT_VARIABLES = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "STAN_NUM_THREADS",
+)
+
+
+def _init_worker(threads: int, log_level: str) -> None:
+    # Ограничиваем потоки в каждом процессе, чтобы N процессов не делили ядра
+    # с N * cpu_count потоками BLAS/Stan
+    for variable in THREAD_LIMIT_VARIABLES:
+        os.environ[variable] = str(threads)
+
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(limits=threads)
+
+    # Процессы запускаются через spawn и не наследуют настройку логирования
+    configure_logging(log_level)
+
+
+class ForecastExecutor:
+    """
+    Пул процессов для параллельного обучения моделей по товарам
+    """
+
+    def __init__(self, max_workers: int = None, threads_per_worker: int = 1, log_level: str = "INFO") -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads_per_worker, log_level)
+        )
+
+    async def map(self, fn: Callable[..., Any], tasks: Iterable[Tuple]) -> List[Any]:
+        # Результаты возвращаются в порядке задач, а не в порядке завершения
+        loop = asyncio.get_running_loop()
+        futures = [loop.run_in_executor(self.pool, fn, *args) for args in tasks]
+        return await asyncio.gather(*futures)
+
+    async def as_completed(
+        self,
+        fn: Callable[..., Any],
+        tasks: Iterable[Tuple]
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        # Отдает пары (индекс задачи, результат) по мере завершения
+        loop = asyncio.get_running_loop()
+
+        async def run(index: int, args: Tuple) -> Tuple[int, Any]:
+            return index, await loop.run_in_executor(self.pool, fn, *args)
+
+        for completed in asyncio.as_completed([run(index, args) for index, args in enumerate(tasks)]):
+            yield await completed
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache
+def get_forecast_executor() -> ForecastExecutor:
+    env = get_environment_variables()
+    return ForecastExecutor(
+        max_workers=env.FORECAST_WORKERS,
+        threads_per_worker=env.FORECAST_THREADS_PER_WORKER,
+        log_level=env.LOG_LEVEL
+    )
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List, Optional, Tuple
+
+from utils.predict import predict_usage
+from utils.model_registry import ModelRegistry
+from utils.usage_matrix import DailyUsageMatrix
+from schemas.pydantic.prediction_schema import PredictionResponseSchema, PredictionDataSchema
+
+# Поля ItemModel, по которым товары объединяются в группы
+HIERARCHY_LEVELS = ("category", "supplier")
+
+# За сколько последних дней считается доля товара в спросе группы
+SHARE_DAYS = 90
+
+
+def sum_by_group(usage: DailyUsageMatrix, item_groups: Dict[int, str], groups: List[str]) -> DailyUsageMatrix:
+    """
+    Суммирует строки товаров в ряды групп
+
+    Строка группы в результате имеет номер группы в списке groups.
+    """
+    codes = {group: code for code, group in enumerate(groups)}
+    rows = np.array([codes[item_groups[int(item_id)]] for item_id in usage.item_ids], dtype='int64')
+
+    values = np.zeros((len(groups), len(usage.dates)), dtype='int64')
+    np.add.at(values, rows, usage.values)
+
+    # Ряд группы начинается с первого дня ее товаров и заканчивается последним
+    spans = np.empty((len(groups), 2), dtype='int64')
+    spans[:, 0], spans[:, 1] = len(usage.dates), -1
+    np.minimum.at(spans[:, 0], rows, usage.spans[:, 0])
+    np.maximum.at(spans[:, 1], rows, usage.spans[:, 1])
+
+    return DailyUsageMatrix(np.arange(len(groups)), usage.dates, values, spans)
+
+
+def recent_shares(
+    usage: DailyUsageMatrix,
+    item_ids: List[int],
+    group_usage: DailyUsageMatrix,
+    group_code: int
+) -> np.ndarray:
+    """
+    Доли товаров в спросе группы за последние SHARE_DAYS дней истории группы
+
+    Если в этом окне у группы не было расхода, берется доля за всю историю.
+    """
+    span = group_usage.span(group_code)
+    group_row, dates = group_usage.row(group_code)[span], group_usage.dates[span]
+    end = dates[-1]
+
+    for start in (end - np.timedelta64(SHARE_DAYS - 1, 'D'), dates[0]):
+        total = group_row[dates >= start].sum()
+        if total > 0:
+            window = (usage.dates >= start) & (usage.dates <= end)
+            return np.array([usage.row(item_id)[window].sum() for item_id in item_ids]) / total
+
+    return np.zeros(len(item_ids))
+
+
+def forecast_proportions(bottom_up: np.ndarray, shares: np.ndarray) -> np.ndarray:
+    """
+    Доли товаров в прогнозе группы по каждому дню из прогнозов товаров снизу вверх
+
+    В дни, когда суммарный прогноз товаров нулевой, используются исторические доли.
+
+    Args:
+        bottom_up: прогнозы товаров группы, товары x дни
+        shares: исторические доли тех же товаров
+    """
+    positive = np.clip(bottom_up, 0, None)
+    total = positive.sum(axis=0, keepdims=True)
+
+    return np.where(total > 0, positive / np.where(total > 0, total, 1), shares[:, None])
+
+
+def disaggregate(forecast: Dict[str, np.ndarray], weights: np.ndarray) -> Dict[str, np.ndarray]:
+    # Делит прогноз группы между товарами; интервалы масштабируются той же долей
+    return {
+        'ds': forecast['ds'],
+        **{key: weights * forecast[key][None, :] for key in ('yhat', 'yhat_lower', 'yhat_upper')}
+    }
+
+
+def forecast_group(
+    item_data: pd.DataFrame,
+    group_key: str,
+    periods: int,
+    registry: Optional[ModelRegistry] = None
+) -> Tuple[Optional[Dict[str, np.ndarray]], Optional[str], Dict[str, float]]:
+    """
+    Обучает Prophet на суммарном ряде группы
+
+    Выполняется в процессе пула, поэтому ошибка возвращается вторым элементом,
+    а не пробрасывается; третий элемент - время стадий для метрик.
+    Модель группы хранится в реестре под ключом group_key.
+    """
+    timings = {}
+    try:
+        forecast = predict_usage(item_data, group_key, periods=periods, registry=registry, timings=timings)
+    except Exception as e:
+        return None, str(e), timings
+
+    return {
+        'ds': forecast['ds'].to_numpy().astype('datetime64[D]'),
+        'yhat': forecast['yhat'].to_numpy(),
+        'yhat_lower': forecast['yhat_lower'].to_numpy(),
+        'yhat_upper': forecast['yhat_upper'].to_numpy()
+    }, None, timings
+
+
+def to_responses(
+    item_ids: List[int],
+    names: Dict[int, str],
+    forecast: Dict[str, np.ndarray]
+) -> List[PredictionResponseSchema]:
+    future = pd.to_datetime(forecast['ds'])
+
+    return [
+        PredictionResponseSchema(
+            item_id=item_id,
+            item_name=names[item_id],
+            predictions=[
+                PredictionDataSchema(
+                    date=date,
+                    predicted_quantity=max(0, float(yhat)),
+                    lower_bound=max(0, float(lower)),
+                    upper_bound=max(0, float(upper))
+                )
+                for date, yhat, lower, upper in zip(
+                    future,
+                    forecast['yhat'][row],
+                    forecast['yhat_lower'][row],
+                    forecast['yhat_upper'][row]
+                )
+            ],
+            status="success"
+        )
+        for row, item_id in enumerate(item_ids)
+    ]
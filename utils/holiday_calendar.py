@@ -0,0 +1,52 @@
+import pandas as pd
+
+from functools import lru_cache
+
+# Праздники в формате (название, месяц, день, lower_window, upper_window)
+# Календарь входит в ключи конфигурации движков: после его изменения модели
+# из реестра и кэшированные прогнозы больше не используются
+HOLIDAYS = (
+    ('new_year', 12, 31, 0, 8),         # Новый год и каникулы
+    ('valentine', 2, 14, -2, 0),        # День святого Валентина
+    ('defender', 2, 23, -3, 1),         # День защитника Отечества
+    ('march_8', 3, 8, -3, 1),           # 8 марта
+    ('cosmonaut', 4, 12, -1, 1),        # День космонавтики
+    ('may_holidays', 5, 1, 0, 9),       # Майские праздники
+    ('children', 6, 1, -1, 1),          # День защиты детей
+    ('russia', 6, 12, -2, 1),           # День России
+    ('family', 7, 8, -1, 1),            # День семьи
+    ('knowledge', 9, 1, -7, 0),         # День знаний
+    ('unity', 11, 4, -2, 1),            # День народного единства
+    ('constitution', 12, 12, -1, 1),    # День Конституции
+)
+
+
+@lru_cache(maxsize=32)
+def _holidays_for_years(start_year: int, end_year: int) -> pd.DataFrame:
+    years = range(start_year, end_year + 1)
+
+    return pd.DataFrame([
+        {
+            'holiday': name,
+            'ds': pd.Timestamp(year=year, month=month, day=day),
+            'lower_window': lower_window,
+            'upper_window': upper_window
+        }
+        for name, month, day, lower_window, upper_window in HOLIDAYS
+        for year in years
+    ])
+
+
+def get_holidays(start_date, end_date) -> pd.DataFrame:
+    """
+    Возвращает праздники в формате Prophet для периода от start_date до end_date
+
+    Календарь строится один раз на диапазон лет и кэшируется в процессе.
+    Период должен покрывать и обучающий ряд, и горизонт прогноза, иначе
+    праздничные эффекты в прогнозе пропадут.
+    """
+    # Берем год раньше: окно Нового года 31 декабря захватывает начало следующего года
+    start_year = pd.Timestamp(start_date).year - 1
+    end_year = pd.Timestamp(end_date).year
+
+    return _holidays_for_years(start_year, end_year).copy()
@@ -0,0 +1,150 @@
+import time
+import threading
+
+from functools import lru_cache
+from collections import OrderedDict
+from typing import NamedTuple, Tuple
+
+from configs.enviroment import get_environment_variables
+from utils.metrics import ITEM_CACHE_REQUESTS
+
+
+class ItemSnapshot(NamedTuple):
+    """
+    Неизменяемая копия строки items
+
+    Не привязана к сессии, поэтому ее можно отдавать из кэша в любые запросы.
+    """
+    item_id: int
+    item_name: str
+    category: str
+    supplier: str
+    purchase_price: float
+    sale_price: float
+    units: str
+    storage_condition: str
+    shelf_life_days: int
+
+    @classmethod
+    def from_model(cls, model) -> "ItemSnapshot":
+        return cls(**model.normalize())
+
+    def normalize(self) -> dict:
+        return self._asdict()
+
+
+# Отличает промах от товара, которого точно нет в справочнике
+MISS = object()
+
+
+class ItemCache:
+    """
+    LRU-кэш справочника товаров в памяти процесса со сроком жизни записей
+
+    Хранит отдельные товары и, если справочник помещается в max_entries,
+    весь справочник целиком: тогда отсутствие товара тоже известно без БД.
+    Справочник больше лимита запоминается как слишком большой, и списки
+    до истечения ttl читаются из БД.
+    Записи сбрасываются при изменении товаров через ItemService этого процесса,
+    а изменения из других процессов становятся видны по истечении ttl.
+    Заполнение передает поколение, взятое до чтения из БД: если за время
+    чтения кэш сбросили, прочитанное могло устареть и не сохраняется.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._items: OrderedDict = OrderedDict()
+        # (срок, товары или None для слишком большого справочника, товары по item_id)
+        self._catalogue = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _record(self, hit: bool) -> None:
+        ITEM_CACHE_REQUESTS.labels(result="hit" if hit else "miss").inc()
+
+    def _fresh_catalogue(self):
+        if self._catalogue is None:
+            return None
+
+        expires_at, items, by_id = self._catalogue
+        if expires_at < time.monotonic():
+            self._catalogue = None
+            return None
+
+        return items, by_id
+
+    def get(self, item_id: int):
+        """
+        Returns:
+            ItemSnapshot, None если товара нет в справочнике, или MISS
+        """
+        with self._lock:
+            catalogue = self._fresh_catalogue()
+            if catalogue is not None and catalogue[0] is not None:
+                self._record(True)
+                return catalogue[1].get(item_id)
+
+            entry = self._items.get(item_id)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._items.move_to_end(item_id)
+                self._record(True)
+                return entry[1]
+
+            self._items.pop(item_id, None)
+            self._record(False)
+            return MISS
+
+    def generation(self) -> int:
+        # Берется до чтения из БД и передается в set и set_catalogue
+        return self._generation
+
+    def set(self, snapshot: ItemSnapshot, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+
+            self._items[snapshot.item_id] = (time.monotonic() + self.ttl, snapshot)
+            self._items.move_to_end(snapshot.item_id)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def catalogue(self):
+        """
+        Returns:
+            Весь справочник по возрастанию item_id, None если он больше
+            max_entries, или MISS
+        """
+        with self._lock:
+            catalogue = self._fresh_catalogue()
+            self._record(catalogue is not None)
+            return catalogue[0] if catalogue is not None else MISS
+
+    def set_catalogue(self, items: Tuple[ItemSnapshot, ...], generation: int) -> None:
+        # Справочник больше лимита целиком не храним, чтобы память оставалась ограниченной
+        expires_at = time.monotonic() + self.ttl
+
+        with self._lock:
+            if generation != self._generation:
+                return
+
+            if len(items) > self.max_entries:
+                self._catalogue = (expires_at, None, {})
+            else:
+                self._catalogue = (expires_at, items, {item.item_id: item for item in items})
+
+    def invalidate(self, item_id: int = None) -> None:
+        # Любое изменение делает устаревшим весь справочник, а не только одну запись
+        with self._lock:
+            self._generation += 1
+            self._catalogue = None
+            if item_id is None:
+                self._items.clear()
+            else:
+                self._items.pop(item_id, None)
+
+
+@lru_cache
+def get_item_cache() -> ItemCache:
+    env = get_environment_variables()
+    return ItemCache(max_entries=env.ITEM_CACHE_SIZE, ttl=env.ITEM_CACHE_TTL_SECONDS)
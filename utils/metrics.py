@@ -0,0 +1,71 @@
+import time
+import logging
+
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from prometheus_client import Counter, Histogram
+
+from configs.enviroment import get_environment_variables
+
+# Границы корзин под запросы от миллисекунд до обучения Prophet на тысячах товаров
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса до отправки последнего байта ответа",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+
+FORECAST_STAGE_DURATION = Histogram(
+    "forecast_stage_duration_seconds",
+    "Время стадий прогнозирования: fetch, prepare, fit, predict",
+    ["engine", "stage"],
+    buckets=LATENCY_BUCKETS
+)
+
+FORECAST_REQUEST_ITEMS = Histogram(
+    "forecast_request_items",
+    "Количество товаров в запросе прогноза",
+    ["engine"],
+    buckets=(1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+)
+
+FORECAST_ITEMS = Counter(
+    "forecast_items",
+    "Прогнозы товаров по источнику (cache, computed) и статусу (success, error)",
+    ["engine", "source", "status"]
+)
+
+
+ITEM_CACHE_REQUESTS = Counter(
+    "item_cache_requests",
+    "Обращения к кэшу справочника товаров по результату (hit, miss)",
+    ["result"]
+)
+
+
+@contextmanager
+def observe_stage(engine: str, stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        FORECAST_STAGE_DURATION.labels(engine=engine, stage=stage).observe(time.perf_counter() - started)
+
+
+def observe_stages(engine: str, timings: Dict[str, float]) -> None:
+    # Тайминги, измеренные в процессе пула и вернувшиеся вместе с результатом
+    for stage, seconds in timings.items():
+        FORECAST_STAGE_DURATION.labels(engine=engine, stage=stage).observe(seconds)
+
+
+def configure_logging(level: str = None) -> None:
+    logging.basicConfig(
+        level=level or get_environment_variables().LOG_LEVEL,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
+    # cmdstanpy сам выставляет своему логгеру DEBUG и пишет по строке на каждое обучение
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
@@ -0,0 +1,121 @@
+import os
+import json
+import hashlib
+import tempfile
+
+import pandas as pd
+
+from typing import NamedTuple, Optional, Tuple
+from functools import lru_cache
+
+from prophet import Prophet
+from prophet.serialize import model_to_json, model_from_json
+
+from configs.enviroment import get_environment_variables
+
+
+class SeriesFingerprint(NamedTuple):
+    rows: int
+    max_date: str
+    checksum: str
+
+
+def series_fingerprint(item_data: pd.DataFrame) -> SeriesFingerprint:
+    """
+    Считает отпечаток обучающего ряда (колонки ds, y)
+
+    Если отпечаток не изменился, ранее обученную модель можно использовать повторно
+    """
+    ds = pd.to_datetime(item_data['ds']).to_numpy(dtype='datetime64[ns]')
+    y = item_data['y'].to_numpy(dtype='float64')
+
+    digest = hashlib.sha256()
+    digest.update(ds.tobytes())
+    digest.update(y.tobytes())
+
+    return SeriesFingerprint(
+        rows=len(item_data),
+        max_date=str(ds.max()) if len(ds) else "",
+        checksum=digest.hexdigest()
+    )
+
+
+def config_hash(config: dict) -> str:
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ModelRegistry:
+    """
+    Хранилище обученных моделей Prophet на диске
+
+    Для каждой пары (товар, конфигурация модели) хранится одна запись с последней
+    обученной моделью и отпечатком ряда, на котором она обучалась.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+
+    def _entry_path(self, item_key: str, config: str) -> str:
+        item_digest = hashlib.sha256(str(item_key).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.path, f"{item_digest}-{config}.json")
+
+    def _read_entry(self, item_key: str, config: str) -> Optional[dict]:
+        try:
+            with open(self._entry_path(item_key, config), encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("item") != str(item_key):
+            return None
+
+        return entry
+
+    def load_latest(
+        self,
+        item_key: str,
+        config: str
+    ) -> Optional[Tuple[SeriesFingerprint, Prophet]]:
+        # Последняя модель товара вместе с отпечатком ее ряда: при совпадении
+        # отпечатка модель используется как есть, иначе - как источник
+        # начальных параметров для дообучения
+        entry = self._read_entry(item_key, config)
+
+        if entry is None:
+            return None
+
+        return SeriesFingerprint(*entry["fingerprint"]), model_from_json(entry["model"])
+
+    def save(
+        self,
+        item_key: str,
+        config: str,
+        fingerprint: SeriesFingerprint,
+        model: Prophet
+    ) -> None:
+        entry = {
+            "item": str(item_key),
+            "config": config,
+            "fingerprint": list(fingerprint),
+            "model": model_to_json(model)
+        }
+
+        # Пишем во временный файл и атомарно подменяем, чтобы параллельные
+        # воркеры никогда не прочитали запись наполовину
+        descriptor, temp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(entry, file)
+            os.replace(temp_path, self._entry_path(item_key, config))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+@lru_cache
+def get_model_registry() -> ModelRegistry:
+    env = get_environment_variables()
+    return ModelRegistry(env.MODEL_REGISTRY_PATH)
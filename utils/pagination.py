@@ -0,0 +1,46 @@
+import json
+import base64
+import binascii
+
+from typing import Any, Generic, List, NamedTuple, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Заголовок REST-ответа с курсором следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page(NamedTuple, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str]
+    # Версии строк страницы для ETag, если репозиторий их отдает
+    versions: Optional[List[tuple]] = None
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Упаковывает ключ последней строки страницы в непрозрачную строку
+
+    Значения должны сериализоваться в JSON: даты передаются в isoformat.
+    """
+    payload = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Распаковывает курсор, созданный encode_cursor
+
+    Raises:
+        ValueError: если курсор поврежден или содержит другое число значений
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Некорректный курсор") from None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Некорректный курсор")
+
+    return values
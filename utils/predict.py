@@ -1,234 +1,162 @@
+import time
+import logging
 import pandas as pd
+import prophet
 from prophet import Prophet
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
 
-from models.transaction_model import TransactionModel
-from models.item_model import ItemModel
+from utils.model_registry import ModelRegistry, SeriesFingerprint, series_fingerprint, config_hash
+from utils.holiday_calendar import get_holidays, HOLIDAYS
+from utils.usage_matrix import DailyUsageMatrix
+from schemas.pydantic.prediction_schema import PredictionResponseSchema, PredictionDataSchema
 
 
-def prepare_data_from_db(
-    transactions_df: pd.DataFrame,
-    items_df: pd.DataFrame
-) -> pd.DataFrame:
+logger = logging.getLogger(__name__)
+
+# Максимальный горизонт прогноза в днях
+MAX_PREDICTION_DAYS = 365
+
+# Сколько новых дней можно дообучить от прошлой модели; при большем приросте
+# параметры могли уйти далеко, и модель обучается с нуля
+WARM_START_MAX_NEW_DAYS = 31
+
+# Параметры модели Prophet, общие для всех товаров
+PROPHET_PARAMS = {
+    'yearly_seasonality': 20,
+    'weekly_seasonality': True,
+    'daily_seasonality': True,
+    'seasonality_mode': 'multiplicative',
+    'changepoint_prior_scale': 0.05,
+    'holidays_prior_scale': 10
+}
+
+# Ключ конфигурации для реестра моделей: меняется при смене параметров,
+# календаря праздников или версии Prophet
+PROPHET_CONFIG = config_hash({
+    'params': PROPHET_PARAMS,
+    'holidays': HOLIDAYS,
+    'prophet': prophet.__version__
+})
+
+
+def prepare_data_from_db(daily_usage: Iterable[tuple]) -> DailyUsageMatrix:
     """
     Подготавливает данные из БД для прогнозирования
     
     Args:
-        transactions_df: DataFrame с транзакциями из БД
-        items_df: DataFrame с товарами из БД
+        daily_usage: строки (item_id, date, quantity) с суммами количества
+            по товару и дню, агрегированными в БД
         
     Returns:
-        DataFrame с подготовленными данными для прогнозирования
+        Матрица товары x дни без пропусков дат
     """
-    # Приводим item_id к одному типу
-    transactions_df['item_id'] = transactions_df['item_id'].astype(str)
-    items_df['item_id'] = items_df['item_id'].astype(str)
+    usage = DailyUsageMatrix.from_rows(daily_usage)
     
-    # Преобразуем дату и округляем до дня
-    transactions_df['date'] = pd.to_datetime(transactions_df['date']).dt.floor('D')
-    
-    # Объединение данных
-    df = transactions_df.merge(items_df, on='item_id')
-    
-    # Группировка по дате (округленной до дня) и подсчет количества
-    daily_usage = df.groupby(['date', 'item_name'])['quantity'].sum().reset_index()
-    
-    if len(daily_usage) > 0:
-        # Получаем диапазон дат
-        min_date = daily_usage['date'].min()
-        max_date = daily_usage['date'].max()
-        
-        # Создаем полный диапазон дат
-        date_range = pd.date_range(start=min_date, end=max_date, freq='D')
-        items = daily_usage['item_name'].unique()
-        
-        # Создаем все возможные комбинации дат и товаров
-        dates_items = pd.MultiIndex.from_product(
-            [date_range, items],
-            names=['date', 'item_name']
+    if not usage.empty:
+        logger.debug(
+            "Prepared data shape: %s, date range: %s - %s",
+            usage.values.shape, usage.dates[0], usage.dates[-1]
         )
-        
-        # Преобразуем в DataFrame и заполняем пропуски нулями
-        daily_usage = (daily_usage
-                      .set_index(['date', 'item_name'])
-                      .reindex(dates_items, fill_value=0)
-                      .reset_index())
-        
-        print(f"Prepared data shape: {daily_usage.shape}")
-        print(f"Unique items: {daily_usage['item_name'].unique()}")
-        print(f"Date range: {daily_usage['date'].min()} - {daily_usage['date'].max()}")
-        print(f"Sample data:\n{daily_usage.head()}")
-        
-        return daily_usage
-    else:
-        return pd.DataFrame(columns=['date', 'item_name', 'quantity'])
+    
+    return usage
 
 
-def prepare_data_from_models(
-    transactions: List[TransactionModel],
-    items: List[ItemModel]
-) -> pd.DataFrame:
-    # Преобразование моделей в датафреймы
-    transactions_df = pd.DataFrame([t.normalize() for t in transactions])
-    items_df = pd.DataFrame([i.normalize() for i in items])
-    
-    # Преобразование столбца date в формат datetime
-    transactions_df['date'] = pd.to_datetime(transactions_df['date'])
-    
-    # Объединение данных
-    df = transactions_df.merge(items_df, on='item_id')
+def warm_start_params(
+    item_data: pd.DataFrame,
+    previous: SeriesFingerprint,
+    model: Prophet
+) -> Optional[dict]:
+    """
+    Возвращает начальные параметры Stan из прошлой модели товара
+
+    Дообучение допустимо, только если новый ряд продолжает ряд прошлой модели:
+    старые дни не изменились, а новых дней не больше WARM_START_MAX_NEW_DAYS.
+    Конфигурация модели совпадает по построению - реестр хранит модели по ней.
     
-    # Группировка по дате и подсчет количества использований
-    daily_usage = df.groupby(['date', 'item_name'])['quantity'].sum().reset_index()
-    return daily_usage
+    Args:
+        item_data: новый ряд товара (колонки ds, y)
+        previous: отпечаток ряда, на котором обучалась прошлая модель
+        model: прошлая модель товара из реестра
+    """
+    new_rows = len(item_data) - previous.rows
+    if not 0 < new_rows <= WARM_START_MAX_NEW_DAYS:
+        return None
 
+    if series_fingerprint(item_data.iloc[:previous.rows]) != previous:
+        return None
 
-def create_holidays():
-    holidays_list = []
-    
-    # Новый год
-    new_year = pd.DataFrame({
-        'holiday': 'new_year',
-        'ds': pd.date_range(start='2015-12-31', end='2026-01-08', freq='YE-DEC'),
-        'lower_window': 0,
-        'upper_window': 8
-    })
-    holidays_list.append(new_year)
-    
-    # День святого Валентина
-    valentine = pd.DataFrame({
-        'holiday': 'valentine',
-        'ds': pd.date_range(start='2015-02-14', end='2026-02-14', freq='YE-FEB'),
-        'lower_window': -2,
-        'upper_window': 0
-    })
-    holidays_list.append(valentine)
-    
-    # День защитника Отечества
-    defender = pd.DataFrame({
-        'holiday': 'defender',
-        'ds': pd.date_range(start='2015-02-23', end='2026-02-23', freq='YE-FEB'),
-        'lower_window': -3,
-        'upper_window': 1
-    })
-    holidays_list.append(defender)
-    
-    # 8 марта
-    march_8 = pd.DataFrame({
-        'holiday': 'march_8',
-        'ds': pd.date_range(start='2015-03-08', end='2026-03-08', freq='YE-MAR'),
-        'lower_window': -3,
-        'upper_window': 1
-    })
-    holidays_list.append(march_8)
-    
-    # День космонавтики
-    cosmonaut = pd.DataFrame({
-        'holiday': 'cosmonaut',
-        'ds': pd.date_range(start='2015-04-12', end='2026-04-12', freq='YE-APR'),
-        'lower_window': -1,
-        'upper_window': 1
-    })
-    holidays_list.append(cosmonaut)
-    
-    # Майские праздники
-    may_holidays = pd.DataFrame({
-        'holiday': 'may_holidays',
-        'ds': pd.date_range(start='2015-05-01', end='2026-05-01', freq='YE-MAY'),
-        'lower_window': 0,
-        'upper_window': 9
-    })
-    holidays_list.append(may_holidays)
-    
-    # День защиты детей
-    children = pd.DataFrame({
-        'holiday': 'children',
-        'ds': pd.date_range(start='2015-06-01', end='2026-06-01', freq='YE-JUN'),
-        'lower_window': -1,
-        'upper_window': 1
-    })
-    holidays_list.append(children)
-    
-    # День России
-    russia = pd.DataFrame({
-        'holiday': 'russia',
-        'ds': pd.date_range(start='2015-06-12', end='2026-06-12', freq='YE-JUN'),
-        'lower_window': -2,
-        'upper_window': 1
-    })
-    holidays_list.append(russia)
-    
-    # День семьи
-    family = pd.DataFrame({
-        'holiday': 'family',
-        'ds': pd.date_range(start='2015-07-08', end='2026-07-08', freq='YE-JUL'),
-        'lower_window': -1,
-        'upper_window': 1
-    })
-    holidays_list.append(family)
-    
-    # День знаний
-    knowledge = pd.DataFrame({
-        'holiday': 'knowledge',
-        'ds': pd.date_range(start='2015-09-01', end='2026-09-01', freq='YE-SEP'),
-        'lower_window': -7,
-        'upper_window': 0
-    })
-    holidays_list.append(knowledge)
-    
-    # День народного единства
-    unity = pd.DataFrame({
-        'holiday': 'unity',
-        'ds': pd.date_range(start='2015-11-04', end='2026-11-04', freq='YE-NOV'),
-        'lower_window': -2,
-        'upper_window': 1
-    })
-    holidays_list.append(unity)
-    
-    # День Конституции
-    constitution = pd.DataFrame({
-        'holiday': 'constitution',
-        'ds': pd.date_range(start='2015-12-12', end='2026-12-12', freq='YE-DEC'),
-        'lower_window': -1,
-        'upper_window': 1
-    })
-    holidays_list.append(constitution)
-    
-    holidays = pd.concat(holidays_list)
-    return holidays
+    # Формат init для Stan: скаляры k, m, sigma_obs и векторы delta, beta
+    return {
+        'k': float(model.params['k'][0][0]),
+        'm': float(model.params['m'][0][0]),
+        'sigma_obs': float(model.params['sigma_obs'][0][0]),
+        'delta': model.params['delta'][0],
+        'beta': model.params['beta'][0]
+    }
 
 
 def predict_usage(
-    daily_usage: pd.DataFrame,
-    item_name: str,
-    periods: int = 365
+    item_data: pd.DataFrame,
+    item_id: int,
+    periods: int = 365,
+    registry: Optional[ModelRegistry] = None,
+    timings: Optional[Dict[str, float]] = None
 ) -> pd.DataFrame:
-    # Получаем данные для конкретного товара
-    item_data = daily_usage[daily_usage['item_name'] == item_name].copy()
-    print(f"Data for item {item_name}:")
-    print(f"Shape: {item_data.shape}")
-    print(f"Date range: {item_data['date'].min()} - {item_data['date'].max()}")
-    print(f"Number of non-zero values: {(item_data['quantity'] > 0).sum()}")
+    # item_data - ряд товара в формате Prophet (колонки ds, y)
+    # timings, если передан, заполняется временем стадий load/fit и predict в секундах
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Data for item %s: shape %s, date range %s - %s, non-zero values %d",
+            item_id, item_data.shape, item_data['ds'].min(), item_data['ds'].max(),
+            (item_data['y'] > 0).sum()
+        )
     
     if len(item_data) < 2:
         raise ValueError("Недостаточно данных для прогнозирования")
     
-    # Переименовываем колонки для Prophet
-    item_data.columns = ['ds', 'item_name', 'y']
-    
-    # Создаем и настраиваем модель
-    model = Prophet(
-        holidays=create_holidays(),
-        yearly_seasonality=20,
-        weekly_seasonality=True,
-        daily_seasonality=True,
-        seasonality_mode='multiplicative',
-        changepoint_prior_scale=0.05,
-        holidays_prior_scale=10
-    )
+    # Если ряд не изменился с прошлого обучения, берем готовую модель из реестра,
+    # а если только дополнился новыми днями - дообучаем от ее параметров
+    started = time.perf_counter()
+    model = None
+    init = None
+    if registry is not None:
+        fingerprint = series_fingerprint(item_data)
+        latest = registry.load_latest(item_id, PROPHET_CONFIG)
+        if latest is not None:
+            previous, previous_model = latest
+            if previous == fingerprint:
+                model = previous_model
+            else:
+                init = warm_start_params(item_data, previous, previous_model)
+    
+    if model is None:
+        # Календарь праздников покрывает ряд и максимальный горизонт, чтобы модель
+        # из реестра оставалась корректной для любого допустимого горизонта
+        holidays = get_holidays(
+            item_data['ds'].min(),
+            item_data['ds'].max() + pd.Timedelta(days=MAX_PREDICTION_DAYS)
+        )
+        
+        # Создаем и настраиваем модель
+        model = Prophet(holidays=holidays, **PROPHET_PARAMS)
+        if init is None:
+            model.fit(item_data)
+        else:
+            try:
+                model.fit(item_data, init=init)
+            except Exception:
+                # Если оптимизация от прошлых параметров не сошлась, обучаем с нуля
+                model = Prophet(holidays=holidays, **PROPHET_PARAMS)
+                model.fit(item_data)
+        
+        if registry is not None:
+            registry.save(item_id, PROPHET_CONFIG, fingerprint, model)
+        
+        stage = 'fit'
+    else:
+        stage = 'load'
     
-    model.fit(item_data)
+    fitted = time.perf_counter()
     
     # Создаем датафрейм для прогноза
     last_date = item_data['ds'].max()
@@ -236,4 +164,57 @@ def predict_usage(
     future_dates = future_dates[future_dates['ds'] > last_date]
     
     forecast = model.predict(future_dates)
+    
+    if timings is not None:
+        timings[stage] = fitted - started
+        timings['predict'] = time.perf_counter() - fitted
+    
     return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+
+
+def forecast_item(
+    item_data: pd.DataFrame,
+    item_id: int,
+    item_name: str,
+    periods: int = 365,
+    registry: Optional[ModelRegistry] = None
+) -> Tuple[PredictionResponseSchema, Dict[str, float]]:
+    """
+    Строит прогноз для одного товара
+
+    Выполняется в процессе пула, поэтому ошибки не пробрасываются,
+    а возвращаются в ответе со статусом error. Вместе с ответом возвращается
+    время стадий, чтобы основной процесс учел его в метриках.
+    """
+    timings = {}
+    try:
+        if len(item_data) < 2:
+            raise ValueError("Недостаточно данных для прогнозирования")
+        
+        forecast = predict_usage(item_data, item_id, periods=periods, registry=registry, timings=timings)
+        
+        # Преобразуем прогноз в список PredictionData
+        predictions = [
+            PredictionDataSchema(
+                date=row.ds,
+                predicted_quantity=max(0, float(row.yhat)),
+                lower_bound=max(0, float(row.yhat_lower)),
+                upper_bound=max(0, float(row.yhat_upper))
+            )
+            for row in forecast.itertuples(index=False)
+        ]
+        
+        return PredictionResponseSchema(
+            item_id=item_id,
+            item_name=item_name,
+            predictions=predictions,
+            status="success"
+        ), timings
+    except Exception as e:
+        return PredictionResponseSchema(
+            item_id=item_id,
+            item_name=item_name,
+            predictions=[],
+            status="error",
+            error=str(e)
+        ), timings
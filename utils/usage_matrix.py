@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from typing import Iterable, List
+
+
+class DailyUsageMatrix:
+    """
+    Плотная матрица суточного расхода: товары x дни
+
+    Строки соответствуют item_ids, столбцы - непрерывному диапазону дат dates.
+    Пропущенные дни заполнены нулями, строка товара берется за O(1) по словарю.
+    spans хранит для каждой строки номера столбцов первого и последнего дня
+    с данными: ряд товара строится только по ним и не зависит от того,
+    какие еще товары попали в матрицу.
+    """
+
+    def __init__(self, item_ids: np.ndarray, dates: np.ndarray, values: np.ndarray, spans: np.ndarray) -> None:
+        self.item_ids = item_ids
+        self.dates = dates
+        self.values = values
+        self.spans = spans
+        self._rows = {int(item_id): row for row, item_id in enumerate(item_ids)}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "DailyUsageMatrix":
+        """
+        Строит матрицу из строк (item_id, date, quantity), агрегированных в БД
+        """
+        rows = list(rows)
+        if not rows:
+            return cls(
+                np.empty(0, dtype='int64'),
+                np.empty(0, dtype='datetime64[D]'),
+                np.empty((0, 0), dtype='int32'),
+                np.empty((0, 2), dtype='int64')
+            )
+
+        raw_items, raw_dates, raw_quantities = zip(*rows)
+        raw_items = np.asarray(raw_items).astype('int64')
+        raw_dates = np.asarray(raw_dates, dtype='datetime64[D]')
+
+        item_ids, item_rows = np.unique(raw_items, return_inverse=True)
+        start = raw_dates.min()
+        dates = np.arange(start, raw_dates.max() + 1)
+
+        columns = (raw_dates - start).astype('int64')
+
+        values = np.zeros((len(item_ids), len(dates)), dtype='int32')
+        np.add.at(values, (item_rows, columns), np.asarray(raw_quantities, dtype='int64'))
+
+        spans = np.empty((len(item_ids), 2), dtype='int64')
+        spans[:, 0], spans[:, 1] = len(dates), -1
+        np.minimum.at(spans[:, 0], item_rows, columns)
+        np.maximum.at(spans[:, 1], item_rows, columns)
+
+        return cls(item_ids, dates, values, spans)
+
+    @property
+    def empty(self) -> bool:
+        return self.values.size == 0
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def row(self, item_id: int) -> np.ndarray:
+        return self.values[self._rows[item_id]]
+
+    def take(self, item_ids: List[int]) -> np.ndarray:
+        return self.values[[self._rows[item_id] for item_id in item_ids]]
+
+    def span(self, item_id: int) -> slice:
+        # Столбцы от первого до последнего дня с данными товара
+        first, last = self.spans[self._rows[item_id]]
+        return slice(int(first), int(last) + 1)
+
+    def series(self, item_id: int) -> pd.DataFrame:
+        # Ряд одного товара в формате Prophet по его собственному диапазону дат;
+        # для неизвестного товара - пустой
+        if item_id not in self._rows:
+            return pd.DataFrame({'ds': pd.to_datetime([]), 'y': np.empty(0, dtype='float64')})
+
+        span = self.span(item_id)
+        return pd.DataFrame({
+            'ds': self.dates[span].astype('datetime64[ns]'),
+            'y': self.row(item_id)[span].astype('float64')
+        })